@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
 from datetime import timedelta
+from os import environ
 from pathlib import Path
 from pickle import TRUE
 
@@ -57,6 +58,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "elsa.commons.profiling.RequestProfilingMiddleware",
+    "elsa.commons.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -160,17 +163,42 @@ LOCALE_PATHS = [BASE_DIR / "translations" / "locale"]
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "message": {
+            "format": "%(message)s",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
         },
+        "profiling": {
+            "class": "logging.StreamHandler",
+            "formatter": "message",
+        },
     },
     "root": {
         "handlers": ["console"],
         "level": "DEBUG",
     },
+    "loggers": {
+        # One JSON line per request, see RequestProfilingMiddleware.
+        "elsa.profiling": {
+            "handlers": ["profiling"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }
 
+# Request profiling, adds a Server-Timing header to every response.
+REQUEST_PROFILING = environ.get("REQUEST_PROFILING") in ["1", "true"]
+
+# Prometheus metrics, scraped from /metrics with the METRICS_TOKEN as a
+# bearer token. Point PROMETHEUS_MULTIPROC_DIR to an empty directory shared
+# by the gunicorn workers and the qcluster to aggregate their metrics.
+METRICS_TOKEN = environ.get("METRICS_TOKEN")
+
 
 # REST Framework
 REST_FRAMEWORK = {
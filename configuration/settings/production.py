@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 import dj_database_url
 
 from datetime import timedelta
+from os import environ
 from pathlib import Path
 
 from .config_utils import get_env_variable
@@ -62,6 +63,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "elsa.commons.profiling.RequestProfilingMiddleware",
+    "elsa.commons.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -101,6 +104,19 @@ DATABASES = {
 }
 
 
+# Cache
+# The catalogs versions and the daily bundles must be shared by every web
+# worker and the django-q processes, a per-process cache would keep
+# serving stale catalogs, so Redis is required.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": get_env_variable("REDIS_URL", STAGE),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -168,17 +184,42 @@ EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "message": {
+            "format": "%(message)s",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
         },
+        "profiling": {
+            "class": "logging.StreamHandler",
+            "formatter": "message",
+        },
     },
     "root": {
         "handlers": ["console"],
         "level": "DEBUG",
     },
+    "loggers": {
+        # One JSON line per request, see RequestProfilingMiddleware.
+        "elsa.profiling": {
+            "handlers": ["profiling"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }
 
+# Request profiling, adds a Server-Timing header to every response.
+REQUEST_PROFILING = environ.get("REQUEST_PROFILING") in ["1", "true"]
+
+# Prometheus metrics, scraped from /metrics with the METRICS_TOKEN as a
+# bearer token. Point PROMETHEUS_MULTIPROC_DIR to an empty directory shared
+# by the gunicorn workers and the qcluster to aggregate their metrics.
+METRICS_TOKEN = environ.get("METRICS_TOKEN")
+
 
 # REST Framework
 REST_FRAMEWORK = {
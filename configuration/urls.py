@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from elsa.commons.metrics import MetricsView
 from elsa.memberships import urls as membership_urls
 from elsa.nutrition import urls as nutrition_urls
 from elsa.psychology import urls as psychology_urls
@@ -46,6 +47,8 @@ urlpatterns = [
         ),
         name="openapi-schema",
     ),
+    # No trailing slash, it is the path Prometheus scrapes by default.
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
 
 urlpatterns += user_urls.urlpatterns
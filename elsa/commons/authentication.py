@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
+from django.utils.crypto import constant_time_compare
 
 from rest_framework.permissions import BasePermission
 
@@ -23,3 +25,15 @@ class IsAdminOrHasMembership(BasePermission):
         """Reject non-Admin users with no active membership."""
         user = request.user
         return user.is_staff or user.membership is not None
+
+
+class HasMetricsToken(BasePermission):
+    """Check the bearer token sent by the metrics scraper."""
+
+    def has_permission(self, request, view):
+        """Reject every request when no METRICS_TOKEN is configured."""
+        token = getattr(settings, "METRICS_TOKEN", None)
+        authorization = request.headers.get("Authorization", "")
+        return bool(token) and constant_time_compare(
+            authorization, f"Bearer {token}"
+        )
@@ -0,0 +1,122 @@
+from functools import partial
+from threading import Lock
+from typing import NamedTuple
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from cachetools import TTLCache
+
+from .profiling import record_cache_lookup
+
+
+def get_catalog_version(name):
+    """Return the current version token of a catalog, it is kept in the
+    cache so it is shared by every process using the same cache backend."""
+    key = f"catalog_version:{name}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_catalog_version(name):
+    """Mark every process-local copy of a catalog as stale."""
+    cache.set(f"catalog_version:{name}", uuid4().hex, timeout=None)
+
+
+def bump_catalog_version_on_commit(name):
+    """Bump the catalog version once the current transaction commits.
+    Bumped earlier, another process could reload the catalog without the
+    uncommitted change and keep it under the new version."""
+    transaction.on_commit(partial(bump_catalog_version, name))
+
+
+class ProcessCatalog:
+    """A process-local copy of static seed data, built once by `loader`
+    and rebuilt whenever the shared catalog version changes."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self._version = None
+        self._data = None
+        self._lock = Lock()
+
+    @property
+    def version(self):
+        return get_catalog_version(self.name)
+
+    def get(self):
+        version = self.version
+        record_cache_lookup(self._version == version)
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._data = self.loader()
+                    self._version = version
+
+        return self._data
+
+    def invalidate(self):
+        bump_catalog_version(self.name)
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ProcessMemo:
+    """A process-local memo of `func`, keyed by `key` called with the same
+    arguments. At most `maxsize` results are kept, the least recently
+    used are evicted first and every result expires after `ttl` seconds.
+    Hits and misses are counted and recorded as cache lookups."""
+
+    def __init__(self, func, key, maxsize, ttl):
+        self.func = func
+        self.key = key
+        self._cache = TTLCache(maxsize, ttl)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, *args, **kwargs):
+        key = self.key(*args, **kwargs)
+        with self._lock:
+            try:
+                value = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                hit = False
+            else:
+                self.hits += 1
+                hit = True
+        record_cache_lookup(hit)
+
+        if not hit:
+            value = self.func(*args, **kwargs)
+            with self._lock:
+                self._cache[key] = value
+
+        return value
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(
+                self.hits,
+                self.misses,
+                self._cache.maxsize,
+                self._cache.currsize,
+            )
+
+    def cache_clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,46 @@
+from hashlib import sha1
+
+from .catalogs import get_catalog_version
+
+# User fields the daily plans are computed from.
+PROFILE_FIELDS = [
+    "gender",
+    "age",
+    "height",
+    "weight",
+    "weight_goal",
+    "diet",
+    "sports_level",
+    "sports_goal",
+]
+
+
+def get_daily_plan_fingerprint(user, catalogs, relative_day, relative_week):
+    """Return a hash of everything a daily plan is computed from: the
+    given catalogs versions, the user's profile and the relative day and
+    week of the plan."""
+    parts = [get_catalog_version(catalog) for catalog in catalogs]
+    parts += [str(getattr(user, field)) for field in PROFILE_FIELDS]
+    parts += [str(relative_day), str(relative_week)]
+
+    return sha1("|".join(parts).encode()).hexdigest()
+
+
+def daily_plan_etag(*catalogs):
+    """Build an `etag_func` for Django's `condition` decorator, the ETag
+    changes with the given catalogs versions, the user's profile and the
+    user's relative training day and week."""
+
+    def etag_func(request, *args, **kwargs):
+        user = request.user
+        if not user.is_authenticated or user.training_start is None:
+            return None
+
+        return get_daily_plan_fingerprint(
+            user,
+            catalogs,
+            user.current_training_day["relative"],
+            user.current_training_week["relative"],
+        )
+
+    return etag_func
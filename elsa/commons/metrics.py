@@ -0,0 +1,138 @@
+import time
+from os import environ
+
+from django.http import HttpResponse
+
+from django_q.brokers import get_broker
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from .authentication import HasMetricsToken
+from .profiling import profile_request
+
+# The metrics are written to PROMETHEUS_MULTIPROC_DIR when it is set, so
+# every gunicorn worker and the qcluster add up to the same series. The
+# hooks of gunicorn.conf.py empty the directory on start and mark the
+# dead workers.
+REQUEST_LATENCY = Histogram(
+    "elsa_request_duration_seconds",
+    "Latency of the requests by route name.",
+    ["view", "method"],
+)
+REQUESTS = Counter(
+    "elsa_requests",
+    "Requests by route name and status code.",
+    ["view", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "elsa_request_db_queries",
+    "SQL queries run by the requests by route name.",
+    ["view"],
+    buckets=[0, 1, 2, 5, 10, 20, 50, 100, 200],
+)
+CACHE_LOOKUPS = Counter(
+    "elsa_cache_lookups",
+    "Lookups of the catalogs, daily bundles and plan templates by route "
+    "name, the hit ratio is hit / (hit + miss).",
+    ["view", "result"],
+)
+TASK_DURATION = Histogram(
+    "elsa_task_duration_seconds",
+    "Run time of the django-q tasks.",
+    ["func", "result"],
+    buckets=[0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 90],
+)
+
+
+def get_route_name(request):
+    """Name of the route that served a request, unmatched requests are
+    grouped together to keep the label values bounded."""
+    return getattr(request.resolver_match, "url_name", None) or "unmatched"
+
+
+def observe_task(task):
+    """Record the run time of a finished django-q task."""
+    if task.started is None or task.stopped is None:
+        return
+
+    TASK_DURATION.labels(
+        task.func, "success" if task.success else "failure"
+    ).observe(task.time_taken())
+
+
+class TaskQueueCollector:
+    """Collect the depth of the django-q queue when scraped."""
+
+    def collect(self):
+        broker = get_broker()
+        yield GaugeMetricFamily(
+            "elsa_task_queue_depth",
+            "Tasks waiting in the django-q queue.",
+            value=broker.queue_size(),
+        )
+        yield GaugeMetricFamily(
+            "elsa_task_queue_locked",
+            "Tasks taken from the django-q queue by a worker.",
+            value=broker.lock_size() or 0,
+        )
+
+
+def collect_metrics():
+    """Render every metric in the Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    queue_registry = CollectorRegistry()
+    queue_registry.register(TaskQueueCollector())
+
+    return generate_latest(registry) + generate_latest(queue_registry)
+
+
+class MetricsMiddleware:
+    """Record the latency, status, SQL queries and cache lookups of every
+    request under the name of its route."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with profile_request() as profile:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view = get_route_name(request)
+        REQUEST_LATENCY.labels(view, request.method).observe(duration)
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        REQUEST_QUERIES.labels(view).observe(profile.queries)
+        if profile.cache_hits:
+            CACHE_LOOKUPS.labels(view, "hit").inc(profile.cache_hits)
+        if profile.cache_misses:
+            CACHE_LOOKUPS.labels(view, "miss").inc(profile.cache_misses)
+
+        return response
+
+
+class MetricsView(APIView):
+    """Expose the metrics to Prometheus, the scraper authenticates with
+    the METRICS_TOKEN as a bearer token."""
+
+    permission_classes = [IsAdminUser | HasMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(
+            collect_metrics(), content_type=CONTENT_TYPE_LATEST
+        )
@@ -0,0 +1,181 @@
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger("elsa.profiling")
+
+# Profile of the request being served, None when profiling is off.
+current_profile = ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    """Timings and counters of a single request, the durations are kept
+    in seconds."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total_time = 0.0
+        self.sql_time = 0.0
+        self.queries = 0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.spans = {}
+
+    def execute(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+    def stop(self):
+        self.total_time = time.perf_counter() - self.start
+
+    def get_server_timing(self):
+        """Return the value of the Server-Timing header."""
+        metrics = [
+            f"total;dur={self.total_time * 1000:.1f}",
+            f'sql;dur={self.sql_time * 1000:.1f};desc="{self.queries} '
+            'queries"',
+            f"serializer;dur={self.serializer_time * 1000:.1f}",
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} '
+            'misses"',
+        ]
+        metrics += [
+            f"{name};dur={duration * 1000:.1f}"
+            for name, duration in self.spans.items()
+        ]
+
+        return ", ".join(metrics)
+
+    def as_dict(self):
+        return {
+            "total_ms": round(self.total_time * 1000, 1),
+            "sql_ms": round(self.sql_time * 1000, 1),
+            "queries": self.queries,
+            "serializer_ms": round(self.serializer_time * 1000, 1),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "spans": {
+                name: round(duration * 1000, 1)
+                for name, duration in self.spans.items()
+            },
+        }
+
+
+def record_cache_lookup(hit):
+    """Count a hit or a miss of one of the application caches."""
+    profile = current_profile.get()
+    if profile is None:
+        return
+
+    if hit:
+        profile.cache_hits += 1
+    else:
+        profile.cache_misses += 1
+
+
+@contextmanager
+def profile_span(name):
+    """Time a block or a function as a named Server-Timing metric of
+    the current request, nothing is recorded when profiling is off."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = current_profile.get()
+        if profile is not None:
+            duration = time.perf_counter() - start
+            profile.spans[name] = profile.spans.get(name, 0) + duration
+
+
+def instrument_serializers():
+    """Time the top level `data` of every DRF serializer, the nested
+    serializers are counted within their parent."""
+    data = BaseSerializer.data
+    if getattr(data.fget, "profiled", False):
+        return
+
+    def profiled_data(serializer):
+        profile = current_profile.get()
+        if profile is None or profile.serializing:
+            return data.fget(serializer)
+
+        profile.serializing = True
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_time += time.perf_counter() - start
+            profile.serializing = False
+
+    profiled_data.profiled = True
+    BaseSerializer.data = property(profiled_data)
+
+
+@contextmanager
+def profile_request():
+    """Profile the queries and cache lookups run within the block, the
+    profile of an enclosing block is reused."""
+    profile = current_profile.get()
+    if profile is not None:
+        yield profile
+        return
+
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(profile.execute)
+                )
+            yield profile
+    finally:
+        current_profile.reset(token)
+        profile.stop()
+
+
+class RequestProfilingMiddleware:
+    """Record the wall, SQL and serializer times, the number of queries
+    and the cache hits and misses of every request. They are sent back
+    in a Server-Timing header and logged as a JSON line to the
+    'elsa.profiling' logger. Enabled by the REQUEST_PROFILING setting."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILING", False):
+            raise MiddlewareNotUsed
+
+        instrument_serializers()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile_request() as profile:
+            response = self.get_response(request)
+
+        response["Server-Timing"] = profile.get_server_timing()
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": getattr(request.resolver_match, "view_name", None),
+                    "status": response.status_code,
+                    **profile.as_dict(),
+                }
+            )
+        )
+
+        return response
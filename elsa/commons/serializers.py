@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+
+class SparseFieldsMixin:
+    """Serializer mixin serializing only the fields listed in the comma
+    separated 'fields' query parameter of a GET request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return
+
+        fields = request.query_params.get("fields")
+        if not fields:
+            return
+
+        names = {name.strip() for name in fields.split(",")}
+        unknown = names - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"unknown fields {', '.join(sorted(unknown))}"}
+            )
+
+        for name in set(self.fields) - names:
+            self.fields.pop(name)
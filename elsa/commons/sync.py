@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.db.models import Q
+from django.db.models.signals import pre_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+# Model the deletions are recorded in.
+TOMBSTONE_MODEL = "users.Tombstone"
+
+# How far 'synced_at' lags behind the sync. Rows are stamped when they
+# are saved but only visible once committed, the overlap lets the next
+# sync catch the ones committed late. The devices dedupe by id.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+def get_tombstone_model():
+    return apps.get_model(TOMBSTONE_MODEL)
+
+
+def get_owner_id(instance, owner):
+    """Follow the 'owner' lookup, such as 'summary__user', from a row to
+    the id of the user owning it."""
+    *path, field = owner.split("__")
+    for name in path:
+        instance = getattr(instance, name)
+
+    return getattr(instance, f"{field}_id")
+
+
+def track_deletions(model, owner=None):
+    """Leave a tombstone for every deleted row of 'model', 'owner' is the
+    lookup of the user owning the rows. The owner is read before the
+    deletion, while the rows it is reached through still exist."""
+
+    def create_tombstone(sender, instance, **kwargs):
+        owner_id = None
+        if owner is not None:
+            owner_id = get_owner_id(instance, owner)
+
+        get_tombstone_model().objects.create(
+            model=sender._meta.label, object_id=instance.pk, owner_id=owner_id
+        )
+
+    pre_delete.connect(create_tombstone, sender=model, weak=False)
+
+
+class DeltaCursorPagination(CursorPagination):
+    """Page through the changes of a delta sync by their update, the id
+    breaks the ties between rows updated at once."""
+
+    ordering = ["updated_at", "id"]
+
+
+class DeltaSyncMixin:
+    """Viewset mixin adding a delta mode to the list action. Given an ISO
+    8601 '?updated_since=', only the rows updated after it are listed,
+    alongside the ids of the rows deleted since then and the 'synced_at'
+    to send on the next sync. The deletions must be tracked with
+    track_deletions().
+
+    Paginated viewsets page the updated rows with the same page size,
+    'next' links to the following page. The deletions and 'synced_at'
+    come with the last page."""
+
+    def get_delta_paginator(self):
+        if self.paginator is None:
+            return None
+
+        paginator = DeltaCursorPagination()
+        for name in ["page_size", "page_size_query_param", "max_page_size"]:
+            setattr(paginator, name, getattr(self.paginator, name, None))
+
+        return paginator
+
+    def list(self, request, *args, **kwargs):
+        updated_since = request.query_params.get("updated_since")
+        if updated_since is None:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            since = parse_datetime(updated_since)
+        except ValueError:
+            since = None
+        if since is None:
+            raise serializers.ValidationError(
+                {"updated_since": "expected an ISO 8601 datetime"}
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, timezone.utc)
+
+        synced_at = timezone.now() - SYNC_OVERLAP
+        queryset = self.filter_queryset(self.get_queryset())
+        updated = queryset.filter(updated_at__gt=since).order_by(
+            "updated_at", "id"
+        )
+
+        next_link = None
+        paginator = self.get_delta_paginator()
+        if paginator is not None:
+            updated = paginator.paginate_queryset(updated, request, view=self)
+            next_link = paginator.get_next_link()
+
+        # The deletions and the next 'synced_at' wait for the last page.
+        deleted = []
+        if next_link is None:
+            tombstones = get_tombstone_model().objects.filter(
+                model=queryset.model._meta.label, deleted_at__gt=since
+            )
+            if not request.user.is_staff:
+                tombstones = tombstones.filter(
+                    Q(owner__isnull=True) | Q(owner=request.user)
+                )
+            deleted = list(tombstones.values_list("object_id", flat=True))
+        else:
+            synced_at = None
+
+        return Response(
+            {
+                "synced_at": synced_at,
+                "next": next_link,
+                "updated": self.get_serializer(updated, many=True).data,
+                "deleted": deleted,
+            }
+        )
@@ -0,0 +1,287 @@
+from contextlib import contextmanager
+from importlib import import_module
+from typing import NamedTuple
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Modules whose routes must all declare a query budget.
+URL_MODULES = [
+    "elsa.memberships.urls",
+    "elsa.nutrition.urls",
+    "elsa.psychology.urls",
+    "elsa.training_plans.urls",
+    "elsa.users.urls",
+]
+
+# List sizes the list endpoints are requested at, a budget that does not
+# hold at every size means the endpoint runs queries per listed item.
+LIST_SIZES = [1, 5]
+
+
+class QueryBudget(NamedTuple):
+    """SQL queries an endpoint may run, plus 'per_item' queries for each
+    item it lists. Authentication is left out, the budgets are checked
+    with force_authenticate()."""
+
+    queries: int
+    per_item: int = 0
+
+    def allowed(self, size):
+        return self.queries + self.per_item * size
+
+
+# One entry per (view, action), the action being the viewset action or
+# the HTTP method of a plain view. The destroy actions of the synced
+# viewsets insert a tombstone per deleted row, the answers read the
+# owner of their summary first, so deleting a summary with its 3
+# answers takes 8 more queries.
+QUERY_BUDGETS = {
+    # elsa.memberships
+    ("BuyMembershipView", "post"): QueryBudget(4),
+    ("BuyMembershipViaPaypalView", "post"): QueryBudget(1),
+    ("PayUResponseView", "get"): QueryBudget(0),
+    ("PayUConfirmationView", "post"): QueryBudget(8),
+    ("MembershipViewSet", "list"): QueryBudget(1),
+    ("MembershipViewSet", "retrieve"): QueryBudget(1),
+    ("MembershipViewSet", "create"): QueryBudget(1),
+    ("MembershipViewSet", "update"): QueryBudget(2),
+    ("MembershipViewSet", "partial_update"): QueryBudget(2),
+    ("MembershipViewSet", "destroy"): QueryBudget(4),
+    ("PaymentViewSet", "list"): QueryBudget(1),
+    ("PaymentViewSet", "retrieve"): QueryBudget(1),
+    # elsa.nutrition
+    # The daily plans are budgeted on a cold cache, they are served from
+    # the daily bundle without queries afterwards.
+    ("DailyNutritionalPlanView", "get"): QueryBudget(10),
+    ("NutritionalPlanView", "get"): QueryBudget(0),
+    # The daily bundle and the foods table, on a cold cache.
+    ("MealComposerView", "get"): QueryBudget(11),
+    # The foods come from the foods table, loaded once on a cold cache.
+    ("DailyNutritionalBillCalculationsView", "get"): QueryBudget(1),
+    ("DailyNutritionalBillCalculationsView", "post"): QueryBudget(1),
+    # A query per table on a cold cache.
+    ("CatalogSnapshotView", "get"): QueryBudget(4),
+    ("FoodViewSet", "list"): QueryBudget(1),
+    # Served from the foods table, loaded once on a cold cache.
+    ("FoodViewSet", "search"): QueryBudget(1),
+    ("FoodViewSet", "retrieve"): QueryBudget(1),
+    ("FoodViewSet", "update"): QueryBudget(2),
+    ("FoodViewSet", "partial_update"): QueryBudget(2),
+    ("FoodViewSet", "destroy"): QueryBudget(3),
+    # elsa.psychology
+    ("DailyPsychologicalPlanView", "get"): QueryBudget(8),
+    ("BorghScaleView", "get"): QueryBudget(1),
+    ("HamiltonQuestionView", "get"): QueryBudget(1),
+    ("PsychologicalTechniqueListView", "get"): QueryBudget(1),
+    ("MoodFeelingsListView", "get"): QueryBudget(0),
+    ("PsychologicalSummaryViewSet", "list"): QueryBudget(1),
+    ("PsychologicalSummaryViewSet", "retrieve"): QueryBudget(1),
+    ("PsychologicalSummaryViewSet", "create"): QueryBudget(2),
+    ("PsychologicalSummaryViewSet", "update"): QueryBudget(3),
+    ("PsychologicalSummaryViewSet", "partial_update"): QueryBudget(3),
+    ("PsychologicalSummaryViewSet", "destroy"): QueryBudget(3),
+    ("PsychologicalQuestionViewSet", "list"): QueryBudget(1),
+    ("PsychologicalQuestionViewSet", "retrieve"): QueryBudget(1),
+    ("PsychologicalQuestionAnswerViewset", "list"): QueryBudget(1),
+    ("PsychologicalQuestionAnswerViewset", "retrieve"): QueryBudget(1),
+    ("PsychologicalQuestionAnswerViewset", "create"): QueryBudget(2),
+    ("PsychologicalQuestionAnswerViewset", "update"): QueryBudget(3),
+    ("PsychologicalQuestionAnswerViewset", "partial_update"): QueryBudget(3),
+    ("PsychologicalQuestionAnswerViewset", "destroy"): QueryBudget(2),
+    ("PsychologicalQuestionAnswerViewset", "batch_create"): (
+        QueryBudget(0, per_item=2)
+    ),
+    # The depth=1 questionaires load their questions and scales one by
+    # one, the summaries compute their SerializerMethodFields per item.
+    ("IrrationalBeliefsQuestionaireViewSet", "list"): (
+        QueryBudget(1, per_item=2)
+    ),
+    ("IrrationalBeliefsQuestionaireViewSet", "retrieve"): QueryBudget(3),
+    ("IrrationalBeliefsSummaryViewSet", "list"): QueryBudget(1, per_item=5),
+    ("IrrationalBeliefsSummaryViewSet", "retrieve"): QueryBudget(6),
+    ("IrrationalBeliefsSummaryViewSet", "create"): QueryBudget(7),
+    ("IrrationalBeliefsSummaryViewSet", "update"): QueryBudget(8),
+    ("IrrationalBeliefsSummaryViewSet", "partial_update"): QueryBudget(8),
+    ("IrrationalBeliefsSummaryViewSet", "destroy"): QueryBudget(11),
+    ("IrrationalBeliefsAnswerViewSet", "list"): QueryBudget(1),
+    ("IrrationalBeliefsAnswerViewSet", "retrieve"): QueryBudget(1),
+    ("IrrationalBeliefsAnswerViewSet", "create"): QueryBudget(2),
+    ("IrrationalBeliefsAnswerViewSet", "update"): QueryBudget(3),
+    ("IrrationalBeliefsAnswerViewSet", "partial_update"): QueryBudget(3),
+    ("IrrationalBeliefsAnswerViewSet", "destroy"): QueryBudget(4),
+    ("PsychologicalInventoryQuestionaireViewSet", "list"): (
+        QueryBudget(1, per_item=1)
+    ),
+    ("PsychologicalInventoryQuestionaireViewSet", "retrieve"): QueryBudget(2),
+    ("PsychologicalInventorySummaryViewSet", "list"): (
+        QueryBudget(1, per_item=2)
+    ),
+    ("PsychologicalInventorySummaryViewSet", "retrieve"): QueryBudget(3),
+    ("PsychologicalInventorySummaryViewSet", "create"): QueryBudget(4),
+    ("PsychologicalInventorySummaryViewSet", "update"): QueryBudget(5),
+    ("PsychologicalInventorySummaryViewSet", "partial_update"): QueryBudget(5),
+    ("PsychologicalInventorySummaryViewSet", "destroy"): QueryBudget(11),
+    ("PsychologicalInventoryAnswerViewSet", "list"): QueryBudget(1),
+    ("PsychologicalInventoryAnswerViewSet", "retrieve"): QueryBudget(1),
+    ("PsychologicalInventoryAnswerViewSet", "create"): QueryBudget(2),
+    ("PsychologicalInventoryAnswerViewSet", "update"): QueryBudget(3),
+    ("PsychologicalInventoryAnswerViewSet", "partial_update"): QueryBudget(3),
+    ("PsychologicalInventoryAnswerViewSet", "destroy"): QueryBudget(4),
+    ("BorghSummaryViewSet", "list"): QueryBudget(1),
+    ("BorghSummaryViewSet", "retrieve"): QueryBudget(1),
+    ("BorghSummaryViewSet", "create"): QueryBudget(3),
+    ("BorghSummaryViewSet", "update"): QueryBudget(4),
+    ("BorghSummaryViewSet", "partial_update"): QueryBudget(4),
+    ("BorghSummaryViewSet", "destroy"): QueryBudget(3),
+    ("HamiltonSummaryViewSet", "list"): QueryBudget(1, per_item=3),
+    ("HamiltonSummaryViewSet", "retrieve"): QueryBudget(4),
+    ("HamiltonSummaryViewSet", "create"): QueryBudget(8),
+    ("HamiltonSummaryViewSet", "update"): QueryBudget(6),
+    ("HamiltonSummaryViewSet", "partial_update"): QueryBudget(6),
+    ("HamiltonSummaryViewSet", "destroy"): QueryBudget(11),
+    ("HamiltonQuestionAnswerViewSet", "list"): QueryBudget(1),
+    ("HamiltonQuestionAnswerViewSet", "retrieve"): QueryBudget(1),
+    ("HamiltonQuestionAnswerViewSet", "create"): QueryBudget(4),
+    ("HamiltonQuestionAnswerViewSet", "update"): QueryBudget(5),
+    ("HamiltonQuestionAnswerViewSet", "partial_update"): QueryBudget(5),
+    ("HamiltonQuestionAnswerViewSet", "destroy"): QueryBudget(4),
+    # Every mood dimension runs its own queries, twice per summary.
+    ("MoodProfileSummaryViewSet", "list"): QueryBudget(1, per_item=16),
+    ("MoodProfileSummaryViewSet", "retrieve"): QueryBudget(17),
+    ("MoodProfileSummaryViewSet", "create"): QueryBudget(18),
+    ("MoodProfileSummaryViewSet", "update"): QueryBudget(19),
+    ("MoodProfileSummaryViewSet", "partial_update"): QueryBudget(19),
+    ("MoodProfileSummaryViewSet", "destroy"): QueryBudget(11),
+    ("MoodProfileAnswerViewSet", "list"): QueryBudget(1),
+    ("MoodProfileAnswerViewSet", "retrieve"): QueryBudget(1),
+    ("MoodProfileAnswerViewSet", "create"): QueryBudget(2),
+    ("MoodProfileAnswerViewSet", "update"): QueryBudget(3),
+    ("MoodProfileAnswerViewSet", "partial_update"): QueryBudget(3),
+    ("MoodProfileAnswerViewSet", "destroy"): QueryBudget(4),
+    # elsa.training_plans
+    ("DailyTrainingPlansView", "get"): QueryBudget(11),
+    # Building the calendar, reading it back takes a single query.
+    ("CompleteTrainingPlanView", "get"): QueryBudget(17),
+    # elsa.users
+    ("LoginView", "post"): QueryBudget(3),
+    ("VerifyUserView", "get"): QueryBudget(2),
+    ("RequestPasswordResetView", "post"): QueryBudget(2),
+    ("ConfirmPasswordResetView", "get"): QueryBudget(1),
+    ("PerformPasswordResetView", "post"): QueryBudget(2),
+    ("TodayView", "get"): QueryBudget(11),
+    ("UserViewSet", "list"): QueryBudget(1),
+    ("UserViewSet", "retrieve"): QueryBudget(1),
+    ("UserViewSet", "create"): QueryBudget(3),
+    ("UserViewSet", "update"): QueryBudget(4),
+    ("UserViewSet", "partial_update"): QueryBudget(4),
+    ("UserViewSet", "destroy"): QueryBudget(20),
+    ("UserViewSet", "register"): QueryBudget(6),
+    ("UserViewSet", "resend_confirmation"): QueryBudget(1),
+}
+
+# Routes without a budget because no request to them can succeed, there
+# is nothing to measure. Foods cannot be created while the nested food
+# group of FoodSerializer is read-only.
+UNREACHABLE_ROUTES = {("FoodViewSet", "create")}
+
+
+def get_results(response):
+    """Items listed by a response, paginated or not."""
+    if isinstance(response.data, dict) and "results" in response.data:
+        return response.data["results"]
+
+    return response.data
+
+
+def get_routes(urls_module):
+    """Return the (view, action) pairs routed by a urls module."""
+    routes = set()
+    for pattern in import_module(urls_module).urlpatterns:
+        view = pattern.callback.cls
+        actions = getattr(pattern.callback, "actions", None)
+        if actions is not None:
+            routes.update(
+                (view.__name__, action) for action in actions.values()
+            )
+        else:
+            routes.update(
+                (view.__name__, method)
+                for method in view.http_method_names
+                if method not in ["head", "options"] and hasattr(view, method)
+            )
+
+    return routes
+
+
+class QueryBudgetMixin:
+    """TestCase mixin checking the endpoints against QUERY_BUDGETS."""
+
+    @contextmanager
+    def assertQueryBudget(self, view, action, size=0):
+        """Fail if the block runs more queries than the budget of the
+        view's action allows at the given list size."""
+        budget = QUERY_BUDGETS[(view, action)]
+        with CaptureQueriesContext(connection) as context:
+            yield
+
+        allowed = budget.allowed(size)
+        if len(context) > allowed:
+            queries = "\n".join(
+                f"{number}. {query['sql']}"
+                for number, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f"{view}.{action} ran {len(context)} queries at list size "
+                f"{size}, its budget allows {allowed}:\n{queries}"
+            )
+
+    def assertListBudget(self, view, url, create_item, action="list"):
+        """Request 'url' at every LIST_SIZES, 'create_item' is called
+        to add one more item to the list."""
+        existing = len(get_results(self.client.get(url)))
+        created = 0
+        for size in LIST_SIZES:
+            for _ in range(size - created):
+                create_item()
+            created = size
+
+            with self.assertQueryBudget(view, action, size):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(get_results(response)), existing + size)
+
+    def assertViewSetBudgets(self, view, basename, create_item, data=None):
+        """Check the list and retrieve actions of a viewset and, when
+        'data' is given, its create, update, partial_update and destroy
+        actions. 'create_item' returns a new instance for the viewset,
+        the instance is updated with 'data' and 'data' is created again
+        once it is deleted."""
+        self.assertListBudget(view, reverse(f"{basename}-list"), create_item)
+
+        detail_url = reverse(f"{basename}-detail", args=[create_item().pk])
+        with self.assertQueryBudget(view, "retrieve"):
+            response = self.client.get(detail_url)
+        self.assertEqual(response.status_code, 200)
+
+        if data is None:
+            return
+
+        with self.assertQueryBudget(view, "update"):
+            response = self.client.put(detail_url, data, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+
+        with self.assertQueryBudget(view, "partial_update"):
+            response = self.client.patch(detail_url, data, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+
+        with self.assertQueryBudget(view, "destroy"):
+            response = self.client.delete(detail_url)
+        self.assertEqual(response.status_code, 204)
+
+        with self.assertQueryBudget(view, "create"):
+            response = self.client.post(
+                reverse(f"{basename}-list"), data, format="json"
+            )
+        self.assertEqual(response.status_code, 201, response.data)
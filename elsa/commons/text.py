@@ -0,0 +1,17 @@
+import unicodedata
+
+
+def strip_accents(text):
+    text = (
+        unicodedata.normalize("NFD", text)
+        .encode("ascii", "ignore")
+        .decode("utf-8")
+    )
+
+    return text
+
+
+def fold_text(text):
+    """Accent and case insensitive form of a text, used to match user
+    searches."""
+    return strip_accents(text).lower()
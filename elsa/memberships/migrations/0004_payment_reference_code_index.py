@@ -0,0 +1,17 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0003_payment_membership_purchased'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['reference_code'], name='memberships_referen_75c6c6_idx'),
+        ),
+    ]
@@ -61,6 +61,9 @@ class Payment(UUIDPrimaryKeyModel, TimeStampedModel):
         max_length=3, choices=AllowedCoins.choices, default=AllowedCoins.USD
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["reference_code"])]
+
 
 class Coupon(UUIDPrimaryKeyModel, TimeStampedModel):
     class CouponNames(models.TextChoices):
@@ -1,3 +1,124 @@
+from datetime import datetime, timezone
+from os import environ
+from unittest.mock import patch
+
 from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from elsa.commons.testing import QueryBudgetMixin
+from elsa.users.models import CustomUser
+
+from .models import Membership, Payment
+from .utils import generate_payu_signature
+from .views import PAYU_API_KEY
+
+PAYMENT_ENVIRON = {
+    "PAYU_MERCHANT_ID": "508029",
+    "PAYU_ACCOUNT_ID": "512321",
+    "PAYU_WEBCHECKOUT_URL": "https://checkout.payulatam.com/",
+    "PAYU_TEST_MODE": "1",
+    "PAYPAL_CLIENT_ID": "client",
+    "PAYPAL_TRIMESTER_PLAN_ID": "trimester",
+}
+
+
+class MembershipsQueryBudgetsTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.membership = Membership.objects.create(price=100)
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=cls.membership,
+            training_start=datetime.now(timezone.utc),
+        )
+        cls.staff_user = CustomUser.objects.create(
+            email="staff@elsa360.com",
+            username="staff",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_staff=True,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_payment(self):
+        return Payment.objects.create(
+            user=self.user,
+            membership_purchased=self.membership,
+            reference_code="0c8c3a33a7c94d1c9fe0a3ec1b7b6d9d",
+            amount=100,
+        )
+
+    def test_memberships_budgets(self):
+        self.assertViewSetBudgets(
+            "MembershipViewSet",
+            "memberships",
+            lambda: Membership.objects.create(
+                tier=Membership.MembershipTiers.YEAR, price=300
+            ),
+            {"tier": Membership.MembershipTiers.SEMESTER, "price": "180.00"},
+        )
+
+    def test_payments_budgets(self):
+        self.assertViewSetBudgets(
+            "PaymentViewSet", "payments", self.create_payment
+        )
+
+    @patch.dict(environ, PAYMENT_ENVIRON)
+    def test_buy_membership_budgets(self):
+        data = {"membership": Membership.MembershipTiers.TRIMESTER}
+        with self.assertQueryBudget("BuyMembershipView", "post"):
+            response = self.client.post(reverse("membership_buy"), data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(self.staff_user)
+        with self.assertQueryBudget("BuyMembershipViaPaypalView", "post"):
+            response = self.client.post(reverse("membership_buy_paypal"), data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_payu_response_budget(self):
+        params = {
+            "merchantId": "508029",
+            "transactionState": Payment.PaymentStatus.APPROVED,
+            "referenceCode": "0c8c3a33a7c94d1c9fe0a3ec1b7b6d9d",
+            "reference_pol": "844180377",
+            "TX_VALUE": "100.00",
+            "processingDate": "2022-07-15",
+            "currency": Payment.AllowedCoins.USD,
+        }
+        params["signature"] = generate_payu_signature(
+            f"{PAYU_API_KEY}~508029~{params['referenceCode']}~100.0~USD~4"
+        )
+
+        with self.assertQueryBudget("PayUResponseView", "get"):
+            response = self.client.get(reverse("payu_response"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_payu_confirmation_budget(self):
+        payment = self.create_payment()
+        data = {
+            "merchant_id": "508029",
+            "state_pol": Payment.PaymentStatus.APPROVED,
+            "reference_sale": payment.reference_code,
+            "value": "100.00",
+            "currency": Payment.AllowedCoins.USD,
+        }
+        data["sign"] = generate_payu_signature(
+            f"{PAYU_API_KEY}~508029~{payment.reference_code}~100.0~USD~4"
+        )
 
-# Create your tests here.
+        with self.assertQueryBudget("PayUConfirmationView", "post"):
+            response = self.client.post(reverse("payu_confirm"), data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1,7 +1,15 @@
 from enum import Enum
 
+import numpy as np
+from rest_framework import status
+
+from elsa.commons.catalogs import ProcessMemo
+from elsa.commons.enums import CalorieIntakeTiers
 from elsa.users.models import CustomUser
 
+from .catalog import get_foods_table, get_nutritional_bill
+from .models import MealSummary
+
 
 class WeightGoals(Enum):
     GAIN = "GAIN"
@@ -20,6 +28,61 @@ WEIGHT_TO_GAIN_LOSE_PER_MONTH_VALUES = {
     4: {WeightGoals.GAIN: 700, WeightGoals.LOSE: -1000},
 }
 
+TEE_PERCENTAGES_PER_GOAL = {
+    WeightGoals.GAIN: {
+        "carbohydrates": 0.53,
+        "protein": 0.25,
+        "fats": 0.22,
+    },
+    WeightGoals.LOSE: {
+        "carbohydrates": 0.48,
+        "protein": 0.30,
+        "fats": 0.22,
+    },
+    WeightGoals.MAINTAIN: {
+        "carbohydrates": 0.54,
+        "protein": 0.16,
+        "fats": 0.30,
+    },
+}
+
+MEALS_DISTRIBUTION_PER_GOAL = {
+    WeightGoals.GAIN: {
+        MealSummary.MealTimes.BREAKFAST: 0.20,
+        MealSummary.MealTimes.SNACK_1: 0.15,
+        MealSummary.MealTimes.LUNCH: 0.20,
+        MealSummary.MealTimes.SNACK_2: 0.15,
+        MealSummary.MealTimes.DINNER: 0.20,
+        MealSummary.MealTimes.NIGHT_SNACK: 0.10,
+    },
+    WeightGoals.LOSE: {
+        MealSummary.MealTimes.BREAKFAST: 0.22,
+        MealSummary.MealTimes.SNACK_1: 0.15,
+        MealSummary.MealTimes.LUNCH: 0.28,
+        MealSummary.MealTimes.SNACK_2: 0.15,
+        MealSummary.MealTimes.DINNER: 0.20,
+        MealSummary.MealTimes.NIGHT_SNACK: 0,
+    },
+    WeightGoals.MAINTAIN: {
+        MealSummary.MealTimes.BREAKFAST: 0.25,
+        MealSummary.MealTimes.SNACK_1: 0.15,
+        MealSummary.MealTimes.LUNCH: 0.35,
+        MealSummary.MealTimes.SNACK_2: 0,
+        MealSummary.MealTimes.DINNER: 0.25,
+        MealSummary.MealTimes.NIGHT_SNACK: 0,
+    },
+}
+
+# Kcal per gram of each macronutrient.
+KCAL_PER_GRAM = {"carbohydrates": 4, "protein": 4, "fats": 9}
+
+# Energy splits memoized per process, and the seconds they are kept.
+ENERGY_SPLIT_CACHE_SIZE = 4096
+ENERGY_SPLIT_CACHE_TTL = 60 * 60
+
+# Food fields summed by the nutritional bill calculations.
+BILL_NUTRIENTS = ["calories", "proteins", "fats", "carbohydrates"]
+
 
 def get_weight_change_per_month(user):
     weight_difference = user.weight_goal - user.weight
@@ -55,17 +118,7 @@ def get_weight_to_gain_lose_per_month(
     return weight_to_gain_lose_per_month
 
 
-def get_total_energy_expenditure(user, day, week):
-    from elsa.training_plans.api import get_daily_plans
-
-    weigth_change_per_month = get_weight_change_per_month(user)
-    weight_goal_conclusion = get_weight_goal_conclusion(user)
-    weight_to_gain_lose_per_month = get_weight_to_gain_lose_per_month(
-        weigth_change_per_month, weight_goal_conclusion
-    )
-
-    cycling_plans, physic_plans = get_daily_plans(user, day, week)
-
+def get_sports_activity_requirement(cycling_plans, physic_plans):
     if len(cycling_plans) == 0:
         cycling_mets = 0
         ctt = 0
@@ -94,6 +147,18 @@ def get_total_energy_expenditure(user, day, week):
         (ctt * cycling_mets) + (cct * cycling_comp_mets) + (gtt * physic_mets)
     )
 
+    return total_sports_activity_requirement
+
+
+def get_resting_energy_expenditure(user):
+    """Return the part of the TEE that only depends on the user's profile,
+    alongside the user's weight goal conclusion."""
+    weigth_change_per_month = get_weight_change_per_month(user)
+    weight_goal_conclusion = get_weight_goal_conclusion(user)
+    weight_to_gain_lose_per_month = get_weight_to_gain_lose_per_month(
+        weigth_change_per_month, weight_goal_conclusion
+    )
+
     basal_metabolic_rate = {
         CustomUser.Genders.MALE: 66
         + (13.7 * user.weight)
@@ -106,12 +171,374 @@ def get_total_energy_expenditure(user, day, week):
     }
     physical_activity_level = 0.2 * basal_metabolic_rate[user.gender]
     foods_thermic_effects = 0.1 * basal_metabolic_rate[user.gender]
-    total_energy_expenditure = (
+    resting_energy_expenditure = (
         basal_metabolic_rate[user.gender]
         + physical_activity_level
         + foods_thermic_effects
-        + total_sports_activity_requirement
         + weight_to_gain_lose_per_month
     )
 
-    return total_energy_expenditure, weight_goal_conclusion
+    return resting_energy_expenditure, weight_goal_conclusion
+
+
+def get_sports_activity_requirements(profile, days):
+    """Return the sports activity requirement of every (day, week) pair
+    for the given plans profile, loading their training plans at once."""
+    from elsa.training_plans.api import get_training_loads
+
+    training_loads = get_training_loads(profile, days)
+
+    return {
+        key: get_sports_activity_requirement(cycling_plans, physic_plans)
+        for key, (cycling_plans, physic_plans) in training_loads.items()
+    }
+
+
+def get_total_energy_expenditures(user, days):
+    """Batch version of `get_total_energy_expenditure`, returns the TEE
+    of every (day, week) pair in the same order they were given."""
+    (
+        resting_energy_expenditure,
+        weight_goal_conclusion,
+    ) = get_resting_energy_expenditure(user)
+
+    sports_requirements = get_sports_activity_requirements(user, days)
+    total_energy_expenditures = [
+        resting_energy_expenditure + sports_requirements[(day, week)]
+        for day, week in days
+    ]
+
+    return total_energy_expenditures, weight_goal_conclusion
+
+
+def get_total_energy_expenditure(user, day, week):
+    (
+        total_energy_expenditures,
+        weight_goal_conclusion,
+    ) = get_total_energy_expenditures(user, [(day, week)])
+
+    return total_energy_expenditures[0], weight_goal_conclusion
+
+
+def get_energy_split_key(user, sports_activity_requirement):
+    """Every input of the energy split, the training rows of the day are
+    summed up by their sports activity requirement."""
+    return (
+        user.gender,
+        user.age,
+        user.height,
+        user.weight,
+        user.weight_goal,
+        sports_activity_requirement,
+    )
+
+
+def compute_energy_split(user, sports_activity_requirement):
+    """Return the TEE of a day split in macronutrients and meals, and the
+    calorie intake tier of its nutritional bill."""
+    (
+        resting_energy_expenditure,
+        weight_goal_conclusion,
+    ) = get_resting_energy_expenditure(user)
+    total_energy_expenditure = (
+        resting_energy_expenditure + sports_activity_requirement
+    )
+
+    daily_carbohydrates = (
+        total_energy_expenditure
+        * TEE_PERCENTAGES_PER_GOAL[weight_goal_conclusion]["carbohydrates"]
+    )
+    daily_protein = (
+        total_energy_expenditure
+        * TEE_PERCENTAGES_PER_GOAL[weight_goal_conclusion]["protein"]
+    )
+    daily_fats = (
+        total_energy_expenditure
+        * TEE_PERCENTAGES_PER_GOAL[weight_goal_conclusion]["fats"]
+    )
+
+    daily_carbohydrates_grams = daily_carbohydrates / 4
+    daily_protein_grams = daily_protein / 4
+    daily_fats_grams = daily_fats / 9
+
+    meal_data = {}
+    for meal in MealSummary.MealTimes:
+        meal_percentage = MEALS_DISTRIBUTION_PER_GOAL[weight_goal_conclusion][
+            meal
+        ]
+        meal_kcal = total_energy_expenditure * meal_percentage
+        meal_carbohydrates = daily_carbohydrates * meal_percentage
+        meal_protein = daily_protein * meal_percentage
+        meal_fats = daily_fats * meal_percentage
+        meal_carbohydrates_grams = daily_carbohydrates_grams * meal_percentage
+        meal_protein_grams = daily_protein_grams * meal_percentage
+        meal_fats_grams = daily_fats_grams * meal_percentage
+
+        meal_data[meal.name] = {
+            "total_kcal": round(meal_kcal, 2),
+            "carbohydrates": round(meal_carbohydrates, 2),
+            "carbohydrates_grams": round(meal_carbohydrates_grams, 2),
+            "protein": round(meal_protein, 2),
+            "protein_grams": round(meal_protein_grams, 2),
+            "fats": round(meal_fats, 2),
+            "fats_grams": round(meal_fats_grams, 2),
+        }
+
+    upper_limit = next(
+        (
+            i.value
+            for i in CalorieIntakeTiers
+            if total_energy_expenditure < i.value
+        ),
+        CalorieIntakeTiers.TIER_7.value,
+    )
+
+    return {
+        "total_daily_requirement": {
+            "get": round(total_energy_expenditure, 2),
+            "carbohydrates": round(daily_carbohydrates, 2),
+            "carbohydrates_grams": round(daily_carbohydrates_grams, 2),
+            "protein": round(daily_protein, 2),
+            "protein_grams": round(daily_protein_grams, 2),
+            "fats": round(daily_fats, 2),
+            "fats_grams": round(daily_fats_grams, 2),
+        },
+        "meal_distribution": meal_data,
+        "upper_calorie_intake": upper_limit,
+    }
+
+
+# The users sharing a profile and a training load share their energy
+# split, the results are shared too and must not be modified.
+get_energy_split = ProcessMemo(
+    compute_energy_split,
+    get_energy_split_key,
+    maxsize=ENERGY_SPLIT_CACHE_SIZE,
+    ttl=ENERGY_SPLIT_CACHE_TTL,
+)
+
+
+def get_profile_warning(user):
+    """Return the response to send instead of a nutritional plan when the
+    user's profile is incomplete or their weight goal is unhealthy, None
+    when a plan can be computed."""
+    if any(
+        [
+            user.age is None,
+            user.height is None,
+            user.weight is None,
+            user.weight_goal is None,
+        ]
+    ):
+        return (
+            {
+                "message": "Please make sure you've "
+                + "set valid values for your 'age', 'height',"
+                + " 'weight and 'weight_goal'."
+            },
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    body_mass_index_goal = user.weight_goal / (user.height_in_meters**2)
+    if body_mass_index_goal < 19.5:
+        return (
+            {
+                "health_warning": "Your Weight Goal is too low and is "
+                + "Unhealthy, please add some Kg for a healthy weight"
+            },
+            status.HTTP_200_OK,
+        )
+    elif body_mass_index_goal > 23.9:
+        return (
+            {
+                "health_warning": "Your Weight Goal is too high and is "
+                + "Unhealthy, please remove some Kg for a healthy weight"
+            },
+            status.HTTP_200_OK,
+        )
+
+    return None
+
+
+def get_daily_nutritional_plan(
+    user, relative_day, relative_week, daily_plans=None
+):
+    """Return the nutritional plan of the given day alongside its HTTP
+    status. The day's cycling and physic plans can be given as
+    'daily_plans' when the caller already loaded them."""
+
+    warning = get_profile_warning(user)
+    if warning is not None:
+        return warning
+
+    user_weight = user.weight
+    user_weight_goal = user.weight_goal
+    user_heigth_squared = user.height_in_meters**2
+
+    liquid_requirement = round((35 * user_weight) / 1000, 2)
+    body_mass_index = user_weight / (user_heigth_squared)
+    BODY_MASS_INDEX_VALUES = {
+        18.4: "Underweight",
+        24.9: "Normal",
+        29.9: "Overweight",
+        34.9: "Obesity type 1",
+        39.9: "Obesity type 2",
+    }
+    healthy_weight_ranges = {
+        "lower limit": round(19.5 * (user_heigth_squared), 2),
+        "ideal weight": round(21.7 * (user_heigth_squared), 2),
+        "upper limit": round(23.9 * (user_heigth_squared), 2),
+    }
+    body_mass_index_goal = user_weight_goal / (user_heigth_squared)
+
+    bmi_status = "Morbid Obesity"
+    bmi_goal_status = "Morbid Obesity"
+    for key, value in BODY_MASS_INDEX_VALUES.items():
+        if body_mass_index < key:
+            bmi_status = value
+            break
+
+    for key, value in BODY_MASS_INDEX_VALUES.items():
+        if body_mass_index_goal < key:
+            bmi_goal_status = value
+            break
+
+    if daily_plans is None:
+        sports_activity_requirement = get_sports_activity_requirements(
+            user, [(relative_day, relative_week)]
+        )[(relative_day, relative_week)]
+    else:
+        sports_activity_requirement = get_sports_activity_requirement(
+            *daily_plans
+        )
+    energy_split = get_energy_split(user, sports_activity_requirement)
+
+    results = {
+        "weight": user.weight,
+        "body_mass_index": round(body_mass_index, 2),
+        "bmi_status": bmi_status,
+        "weight_goal": user.weight_goal,
+        "body_mass_index_goal": round(body_mass_index_goal, 2),
+        "bmi_goal_status": bmi_goal_status,
+        "healthy_weight_ranges": healthy_weight_ranges,
+        "liquid_requirement": liquid_requirement,
+        "total_daily_requirement": energy_split["total_daily_requirement"],
+        "meal_distribution": energy_split["meal_distribution"],
+        "nutritional_bill": get_nutritional_bill(
+            user.diet, energy_split["upper_calorie_intake"]
+        ),
+    }
+
+    return results, status.HTTP_200_OK
+
+
+def get_nutritional_plan_table(user, moments):
+    """Return the TEE, macronutrients and meal distribution of several
+    days as a table alongside its HTTP status, the numbers of every day
+    and meal are computed at once over days x meals arrays."""
+    warning = get_profile_warning(user)
+    if warning is not None:
+        return warning
+
+    days = [
+        (
+            user.get_training_day(moment)["relative"],
+            user.get_training_week(moment)["relative"],
+        )
+        for moment in moments
+    ]
+    (
+        resting_energy_expenditure,
+        weight_goal_conclusion,
+    ) = get_resting_energy_expenditure(user)
+    sports_requirements = get_sports_activity_requirements(user, days)
+
+    total_energy_expenditures = resting_energy_expenditure + np.array(
+        [sports_requirements[day] for day in days], dtype=float
+    )
+
+    macronutrients = list(KCAL_PER_GRAM)
+    percentages = [
+        TEE_PERCENTAGES_PER_GOAL[weight_goal_conclusion][macronutrient]
+        for macronutrient in macronutrients
+    ]
+    kcal_per_gram = np.array(list(KCAL_PER_GRAM.values()))
+    macronutrients_grams = (
+        np.outer(total_energy_expenditures, percentages) / kcal_per_gram
+    )
+
+    meals_kcal = np.outer(
+        total_energy_expenditures,
+        [
+            MEALS_DISTRIBUTION_PER_GOAL[weight_goal_conclusion][meal]
+            for meal in MealSummary.MealTimes
+        ],
+    )
+
+    # Same tier as the daily plan, the first one above the TEE.
+    calorie_tiers = np.array(CalorieIntakeTiers.values)
+    upper_calorie_intakes = calorie_tiers[
+        np.minimum(
+            np.searchsorted(
+                calorie_tiers, total_energy_expenditures, side="right"
+            ),
+            len(calorie_tiers) - 1,
+        )
+    ]
+
+    total_energy_expenditures = np.round(total_energy_expenditures, 2)
+    macronutrients_grams = np.round(macronutrients_grams, 2)
+    meals_kcal = np.round(meals_kcal, 2)
+
+    table = [
+        {
+            "date": moment.date(),
+            "day": day,
+            "week": week,
+            "tee": total_energy_expenditures[index].item(),
+            **{
+                f"{macronutrient}_grams": grams
+                for macronutrient, grams in zip(
+                    macronutrients, macronutrients_grams[index].tolist()
+                )
+            },
+            "meals_kcal": meals_kcal[index].tolist(),
+            "upper_calorie_intake": upper_calorie_intakes[index].item(),
+        }
+        for index, (moment, (day, week)) in enumerate(zip(moments, days))
+    ]
+
+    results = {
+        "liquid_requirement": round((35 * user.weight) / 1000, 2),
+        "meals": [meal.name for meal in MealSummary.MealTimes],
+        "days": table,
+    }
+
+    return results, status.HTTP_200_OK
+
+
+def get_nutritional_bill_calculations(meals):
+    """Return the calories of every meal and the calories and
+    macronutrients of the whole day. 'meals' maps each meal to a list of
+    food UUIDs, a food listed twice is counted twice."""
+    foods_table = get_foods_table()
+
+    totals = dict.fromkeys(BILL_NUTRIENTS, 0)
+    meal_calories = {}
+    for meal, food_ids in meals.items():
+        rows = foods_table.get_rows(food_ids)
+        if not len(rows):
+            continue
+
+        meal_nutrients = foods_table.sum(rows, BILL_NUTRIENTS)
+        for nutrient, amount in meal_nutrients.items():
+            totals[nutrient] += amount
+        meal_calories[meal] = round(meal_nutrients["calories"], 2)
+
+    results = {
+        f"total_{nutrient}": round(total, 2)
+        for nutrient, total in totals.items()
+    }
+    results.update(meal_calories)
+
+    return results
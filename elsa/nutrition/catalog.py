@@ -0,0 +1,198 @@
+import heapq
+import re
+from collections import Counter, defaultdict
+from functools import cached_property
+
+import numpy as np
+
+from elsa.commons.catalogs import ProcessCatalog
+from elsa.commons.text import fold_text
+
+from .models import Food, MealSummary
+from .serializers import MealSummarySerializer
+
+
+def load_meal_summaries_catalog():
+    """Serialize every meal summary once, indexed by (diet,
+    upper_calorie_intake), in 2 queries."""
+    meal_summaries_qs = MealSummary.objects.order_by(
+        "upper_calorie_intake", "mealtime"
+    ).prefetch_related("food_group_intakes")
+
+    serializer = MealSummarySerializer(meal_summaries_qs, many=True)
+
+    catalog = {}
+    for meal_summary, data in zip(meal_summaries_qs, serializer.data):
+        key = (meal_summary.diet, meal_summary.upper_calorie_intake)
+        catalog.setdefault(key, []).append(data)
+
+    return catalog
+
+
+meal_summaries_catalog = ProcessCatalog(
+    "meal_summaries", load_meal_summaries_catalog
+)
+
+
+def get_nutritional_bill(diet, upper_calorie_intake):
+    """Return the serialized meal summaries of a diet and calorie tier."""
+    return list(
+        meal_summaries_catalog.get().get((diet, upper_calorie_intake), [])
+    )
+
+
+# Numeric Food fields kept as columns of the foods table.
+FOOD_COLUMNS = [
+    "calories",
+    "proteins",
+    "fats",
+    "carbohydrates",
+    "cooked_half_portion",
+    "raw_half_portion",
+]
+
+# Most foods a search returns, and the share of the query trigrams a
+# name must contain to match when it does not contain the query itself.
+SEARCH_LIMIT = 20
+SEARCH_THRESHOLD = 0.5
+
+
+def get_search_text(text):
+    """Return the accent and case folded words of a text."""
+    return " ".join(re.findall(r"[a-z0-9]+", fold_text(text)))
+
+
+def get_trigrams(text):
+    """Return the trigrams of every word of a search text, the words are
+    padded like pg_trgm does so their starts weigh more."""
+    trigrams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        trigrams.update(
+            "".join(chars) for chars in zip(padded, padded[1:], padded[2:])
+        )
+
+    return trigrams
+
+
+class FoodTable:
+    """Column-oriented copy of the foods: one contiguous float array per
+    numeric field, the food ids, names and supergroups in row order and
+    the row of every food id in 'index'."""
+
+    def __init__(self, rows):
+        fields = list(zip(*rows)) or [()] * (3 + len(FOOD_COLUMNS))
+        pks, names, supergroups, *columns = fields
+        self.pks = list(pks)
+        self.names = list(names)
+        self.supergroups = np.array(supergroups, dtype=str)
+        self.columns = {
+            name: np.array(values, dtype=float)
+            for name, values in zip(FOOD_COLUMNS, columns)
+        }
+        self.index = {pk: row for row, pk in enumerate(self.pks)}
+
+    def __len__(self):
+        return len(self.pks)
+
+    def get_rows(self, pks):
+        """Return the rows of the given food UUIDs, repeated ids are kept
+        and unknown ones are skipped."""
+        return np.array(
+            [self.index[pk] for pk in pks if pk in self.index], dtype=np.intp
+        )
+
+    def get_food(self, row):
+        """Return the food at 'row' as a dict."""
+        return {
+            "id": self.pks[row],
+            "name": self.names[row],
+            "supergroup": self.supergroups[row].item(),
+            **{
+                column: values[row].item()
+                for column, values in self.columns.items()
+            },
+        }
+
+    @cached_property
+    def candidates(self):
+        """Rows of the foods of every supergroup, the foods without any
+        calories are left out."""
+        candidates = {}
+        for supergroup in np.unique(self.supergroups):
+            rows = np.flatnonzero(
+                (self.supergroups == supergroup)
+                & (self.columns["calories"] > 0)
+            )
+            if len(rows):
+                candidates[supergroup.item()] = rows
+
+        return candidates
+
+    @cached_property
+    def search_index(self):
+        """The search text of every food name and the rows of every
+        trigram found in them."""
+        search_names = [get_search_text(name) for name in self.names]
+        trigrams = defaultdict(list)
+        for row, name in enumerate(search_names):
+            for trigram in get_trigrams(name):
+                trigrams[trigram].append(row)
+
+        return search_names, dict(trigrams)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Return the rows of the foods whose name matches 'query', best
+        first: the names starting with the query, the names with a word
+        starting with it, then by share of the query trigrams found."""
+        query = get_search_text(query)
+        query_trigrams = get_trigrams(query)
+        if not query_trigrams:
+            return []
+
+        search_names, trigrams = self.search_index
+        hits = Counter()
+        for trigram in query_trigrams:
+            hits.update(trigrams.get(trigram, []))
+
+        ranked = []
+        for row, count in hits.items():
+            name = search_names[row]
+            similarity = count / len(query_trigrams)
+            if query not in name and similarity < SEARCH_THRESHOLD:
+                continue
+
+            ranked.append(
+                (
+                    not name.startswith(query),
+                    f" {query}" not in f" {name}",
+                    -similarity,
+                    name,
+                    row,
+                )
+            )
+
+        return [rank[-1] for rank in heapq.nsmallest(limit, ranked)]
+
+    def sum(self, rows, columns=FOOD_COLUMNS):
+        """Sum the given columns over 'rows'."""
+        return {
+            column: self.columns[column][rows].sum().item()
+            for column in columns
+        }
+
+
+def load_foods_table():
+    """Load every food in a single query."""
+    foods_qs = Food.objects.order_by("name").values_list(
+        "pk", "name", "food_group__supergroup", *FOOD_COLUMNS
+    )
+
+    return FoodTable(foods_qs)
+
+
+foods_table = ProcessCatalog("foods", load_foods_table)
+
+
+def get_foods_table():
+    return foods_table.get()
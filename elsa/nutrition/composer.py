@@ -0,0 +1,240 @@
+from itertools import chain, zip_longest
+
+import numpy as np
+
+from .catalog import get_foods_table
+from .models import MealSummary
+
+# Foods table columns matched against the meal distribution grams.
+MACRONUTRIENTS = {
+    "carbohydrates": "carbohydrates_grams",
+    "proteins": "protein_grams",
+    "fats": "fats_grams",
+}
+
+# The intakes count portions, the foods nutrients are given per half
+# portion, so foods are served by half portions.
+HALF_PORTIONS_PER_PORTION = 2
+
+# Most foods served for a supergroup in a meal.
+MAX_FOODS_PER_SUPERGROUP = 2
+
+# Added to the error of a food for every previous meal of the day it is
+# served in, so the day is not made of the same few foods.
+REPEAT_PENALTY = 0.05
+
+# Bound of the local search passes over a meal, and the least error
+# decrease a change must bring.
+MAX_PASSES = 20
+TOLERANCE = 1e-9
+
+
+class MealComposer:
+    """Pick the foods and portions of the meals of a day, so they meet the
+    supergroup intakes exactly and the macronutrient grams as closely as
+    possible. Every half portion is first given greedily to the food
+    that reduces the error the most, then foods are swapped and portions
+    moved between foods while the error keeps decreasing."""
+
+    def __init__(self, foods_table):
+        self.foods_table = foods_table
+        self.nutrients = np.column_stack(
+            [foods_table.columns[column] for column in MACRONUTRIENTS]
+        )
+        self.repeats = np.zeros(len(foods_table))
+
+    def get_errors(self, totals, targets):
+        """Squared relative error of every row of 'totals'."""
+        scale = np.maximum(targets, 1)
+        return (((totals - targets) / scale) ** 2).sum(axis=-1)
+
+    def get_penalty(self, servings):
+        """Repeat penalty of the foods of a meal."""
+        rows = [row for foods in servings.values() for row in foods]
+        return REPEAT_PENALTY * self.repeats[rows].sum()
+
+    def fill(self, intakes, targets):
+        """Give every half portion to the best food of its supergroup."""
+        candidates = self.foods_table.candidates
+        half_portions = [
+            [supergroup] * round(portions * HALF_PORTIONS_PER_PORTION)
+            for supergroup, portions in intakes.items()
+            if supergroup in candidates
+        ]
+
+        servings = {}
+        totals = np.zeros(len(MACRONUTRIENTS))
+        # The supergroups take turns so none of them is filled last.
+        for supergroup in chain(*zip_longest(*half_portions)):
+            if supergroup is None:
+                continue
+
+            foods = servings.setdefault(supergroup, {})
+            rows = candidates[supergroup]
+            if len(foods) >= MAX_FOODS_PER_SUPERGROUP:
+                rows = np.array(list(foods))
+
+            errors = self.get_errors(totals + self.nutrients[rows], targets)
+            errors += REPEAT_PENALTY * np.where(
+                np.isin(rows, list(foods)), 0, self.repeats[rows]
+            )
+            row = rows[errors.argmin()].item()
+            foods[row] = foods.get(row, 0) + 1
+            totals += self.nutrients[row]
+
+        return servings, totals
+
+    def improve(self, servings, totals, targets):
+        """Swap foods and move half portions to other foods of a
+        supergroup while it lowers the error, returns the new totals and
+        whether the meal changed."""
+        candidates = self.foods_table.candidates
+        penalty = self.get_penalty(servings)
+        error = self.get_errors(totals, targets) + penalty
+        improved = False
+
+        for supergroup, foods in servings.items():
+            rows = candidates[supergroup]
+            for row in list(foods):
+                # Serve all the half portions of the food with another one.
+                count = foods[row]
+                others = [other for other in foods if other != row]
+                swapped = totals - count * self.nutrients[row]
+                swapped_penalty = penalty - REPEAT_PENALTY * self.repeats[row]
+                errors = (
+                    self.get_errors(
+                        swapped + count * self.nutrients[rows], targets
+                    )
+                    + swapped_penalty
+                    + REPEAT_PENALTY
+                    * np.where(np.isin(rows, others), 0, self.repeats[rows])
+                )
+                best = errors.argmin()
+                if errors[best] < error - TOLERANCE:
+                    other = rows[best].item()
+                    del foods[row]
+                    if other not in foods:
+                        swapped_penalty += REPEAT_PENALTY * self.repeats[other]
+                    foods[other] = foods.get(other, 0) + count
+                    totals = swapped + count * self.nutrients[other]
+                    penalty = swapped_penalty
+                    error = errors[best]
+                    improved = True
+
+            # Move one half portion to another food of the supergroup, a
+            # new one while the supergroup has room for it.
+            for row in list(foods):
+                if foods[row] < 2:
+                    continue
+
+                others = rows
+                if len(foods) >= MAX_FOODS_PER_SUPERGROUP:
+                    others = np.array(list(foods))
+
+                moved = totals - self.nutrients[row] + self.nutrients[others]
+                errors = (
+                    self.get_errors(moved, targets)
+                    + penalty
+                    + REPEAT_PENALTY
+                    * np.where(
+                        np.isin(others, list(foods)), 0, self.repeats[others]
+                    )
+                )
+                best = errors.argmin()
+                if errors[best] < error - TOLERANCE:
+                    other = others[best].item()
+                    if other not in foods:
+                        penalty += REPEAT_PENALTY * self.repeats[other]
+                    foods[row] -= 1
+                    foods[other] = foods.get(other, 0) + 1
+                    totals = moved[best]
+                    error = errors[best]
+                    improved = True
+
+        return totals, improved
+
+    def compose(self, intakes, targets):
+        """Return the foods of a meal as (row, half portions) pairs.
+        'intakes' maps each supergroup to its portions and 'targets'
+        holds the meal's macronutrient grams."""
+        targets = np.array(targets, dtype=float)
+        servings, totals = self.fill(intakes, targets)
+        for _ in range(MAX_PASSES):
+            totals, improved = self.improve(servings, totals, targets)
+            if not improved:
+                break
+
+        foods = [
+            (row, count)
+            for supergroup in intakes
+            for row, count in servings.get(supergroup, {}).items()
+        ]
+        for row, _ in foods:
+            self.repeats[row] += 1
+
+        return foods
+
+
+def get_meal_foods(foods_table, foods):
+    """Serialize the foods picked for a meal and their totals."""
+    meal_foods = []
+    for row, count in foods:
+        food = foods_table.get_food(row)
+        meal_foods.append(
+            {
+                "id": food["id"],
+                "name": food["name"],
+                "supergroup": food["supergroup"],
+                "portions": count / HALF_PORTIONS_PER_PORTION,
+                "cooked_grams": round(food["cooked_half_portion"] * count, 2),
+                "raw_grams": round(food["raw_half_portion"] * count, 2),
+                "calories": round(food["calories"] * count, 2),
+            }
+        )
+
+    rows = np.repeat(
+        [row for row, _ in foods], [count for _, count in foods]
+    ).astype(np.intp)
+    totals = foods_table.sum(rows, ["calories", *MACRONUTRIENTS])
+
+    return meal_foods, {
+        nutrient: round(total, 2) for nutrient, total in totals.items()
+    }
+
+
+def compose_daily_meals(nutrition):
+    """Compose the meals of a daily nutritional plan, every meal summary
+    of its nutritional bill is filled with foods meeting its supergroup
+    intakes and the grams of its meal distribution."""
+    foods_table = get_foods_table()
+    composer = MealComposer(foods_table)
+
+    meals = []
+    for meal_summary in nutrition["nutritional_bill"]:
+        mealtime = MealSummary.MealTimes(int(meal_summary["mealtime"]))
+        distribution = nutrition["meal_distribution"][mealtime.name]
+        intakes = {}
+        for intake in meal_summary["food_group_intakes"]:
+            supergroup = intake["food_supergroup"]
+            intakes[supergroup] = intakes.get(supergroup, 0) + intake["intake"]
+
+        foods = composer.compose(
+            intakes, [distribution[grams] for grams in MACRONUTRIENTS.values()]
+        )
+        meal_foods, totals = get_meal_foods(foods_table, foods)
+        meals.append(
+            {
+                "mealtime": mealtime.name,
+                "targets": {
+                    "calories": distribution["total_kcal"],
+                    **{
+                        nutrient: distribution[grams]
+                        for nutrient, grams in MACRONUTRIENTS.items()
+                    },
+                },
+                "totals": totals,
+                "foods": meal_foods,
+            }
+        )
+
+    return meals
@@ -1,5 +1,4 @@
 import json
-import unicodedata
 import django
 import gspread
 
@@ -11,15 +10,7 @@ from configuration.settings.config_utils import get_env_variable
 
 from django.conf import settings
 
-
-def strip_accents(text):
-    text = (
-        unicodedata.normalize("NFD", text)
-        .encode("ascii", "ignore")
-        .decode("utf-8")
-    )
-
-    return text
+from elsa.commons.text import strip_accents
 
 
 def main():
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.5 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutrition', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='food',
+            index=models.Index(fields=['updated_at'], name='nutrition_f_updated_a5653d_idx'),
+        ),
+    ]
@@ -174,6 +174,9 @@ class Food(UUIDPrimaryKeyModel, TimeStampedModel):
         max_length=5, choices=HomeMeasures.choices, default=HomeMeasures.CUP
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["updated_at"])]
+
 
 class MealSummary(UUIDPrimaryKeyModel, TimeStampedModel):
     class MealTimes(models.IntegerChoices):
@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FoodCursorPagination(CursorPagination):
+    """Page through the foods alphabetically, the id breaks the ties
+    between foods with the same name."""
+
+    ordering = ["name", "id"]
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from elsa.commons.serializers import SparseFieldsMixin
+
 from .models import FoodGroup, Food, MealSummary, FoodGroupIntake
 
 
@@ -20,7 +22,28 @@ class FoodGroupSerializer(serializers.ModelSerializer):
         fields = ["supergroup", "group"]
 
 
-class FoodSerializer(serializers.ModelSerializer):
+class FoodSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Food with its nested food group, the group is given as flat
+    'supergroup' and 'group' fields when a GET request sets the
+    'flat_group' query parameter."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return fields
+
+        if request.query_params.get("flat_group") in ["1", "true"]:
+            del fields["food_group"]
+            fields["supergroup"] = serializers.CharField(
+                source="food_group.supergroup", read_only=True
+            )
+            fields["group"] = serializers.CharField(
+                source="food_group.group", read_only=True
+            )
+
+        return fields
+
     class Meta:
         model = Food
         fields = [
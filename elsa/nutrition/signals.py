@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from elsa.commons.catalogs import bump_catalog_version_on_commit
+from elsa.commons.sync import track_deletions
+
+from .models import Food, FoodGroup, FoodGroupIntake, MealSummary
+
+
+@receiver(post_save, sender=MealSummary)
+@receiver(post_save, sender=FoodGroupIntake)
+@receiver(post_delete, sender=MealSummary)
+@receiver(post_delete, sender=FoodGroupIntake)
+def invalidate_meal_summaries_catalog(sender, **kwargs):
+    bump_catalog_version_on_commit("meal_summaries")
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_save, sender=FoodGroup)
+@receiver(post_delete, sender=Food)
+@receiver(post_delete, sender=FoodGroup)
+def invalidate_foods_table(sender, **kwargs):
+    bump_catalog_version_on_commit("foods")
+
+
+track_deletions(Food)
@@ -0,0 +1,94 @@
+import gzip
+import json
+from hashlib import sha1
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from elsa.commons.catalogs import get_catalog_version
+from elsa.commons.profiling import record_cache_lookup
+
+from .models import Food, FoodGroup, FoodGroupIntake, MealSummary
+
+# Catalogs the snapshot is built from, a new version of any of them
+# builds a new snapshot.
+SNAPSHOT_CATALOGS = ["foods", "meal_summaries"]
+
+# Tables of the snapshot and the fields kept of every row.
+SNAPSHOT_TABLES = {
+    "food_groups": (FoodGroup, ["id", "supergroup", "group"]),
+    "foods": (
+        Food,
+        [
+            "id",
+            "name",
+            "food_group_id",
+            "calories",
+            "cooked_half_portion",
+            "raw_half_portion",
+            "proteins",
+            "fats",
+            "carbohydrates",
+            "home_measure_amount",
+            "home_measure_type",
+        ],
+    ),
+    "meal_summaries": (
+        MealSummary,
+        [
+            "id",
+            "mealtime",
+            "diet",
+            "calorie_intake_type",
+            "upper_calorie_intake",
+        ],
+    ),
+    "food_group_intakes": (
+        FoodGroupIntake,
+        ["id", "meal_summary_id", "food_supergroup", "intake"],
+    ),
+}
+
+# Snapshots of outdated catalog versions are left to expire.
+SNAPSHOT_TIMEOUT = 60 * 60 * 24 * 7
+
+
+class CatalogSnapshot(NamedTuple):
+    """Gzip compressed JSON of the snapshot tables, the version is a hash
+    of the JSON so it only changes with the content."""
+
+    version: str
+    blob: bytes
+
+
+def build_catalog_snapshot():
+    """Dump every snapshot table in a query each."""
+    tables = {
+        name: list(model.objects.order_by("id").values(*fields))
+        for name, (model, fields) in SNAPSHOT_TABLES.items()
+    }
+    content = json.dumps(
+        tables, cls=DjangoJSONEncoder, separators=(",", ":")
+    ).encode()
+
+    return CatalogSnapshot(
+        sha1(content).hexdigest(),
+        gzip.compress(content, compresslevel=9, mtime=0),
+    )
+
+
+def get_catalog_snapshot():
+    """Return the snapshot of the current catalog versions from the
+    cache, building and storing it on a miss."""
+    versions = "|".join(
+        get_catalog_version(catalog) for catalog in SNAPSHOT_CATALOGS
+    )
+    key = f"catalog_snapshot:{sha1(versions.encode()).hexdigest()}"
+    snapshot = cache.get(key)
+    record_cache_lookup(snapshot is not None)
+    if snapshot is None:
+        snapshot = build_catalog_snapshot()
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+
+    return snapshot
@@ -1,3 +1,760 @@
+import gzip
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+import numpy as np
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from elsa.commons.enums import CalorieIntakeTiers, Diet
+from elsa.commons.testing import QueryBudgetMixin
+from elsa.memberships.models import Membership
+from elsa.training_plans.api import fetch_daily_plans
+from elsa.training_plans.models import QuestionsToPlan, TrainingPlan
+from elsa.training_plans.tests import create_cycling_plan, create_physic_plan
+from elsa.users.models import CustomUser
+
+from .api import (
+    compute_energy_split,
+    get_energy_split,
+    get_resting_energy_expenditure,
+    get_sports_activity_requirement,
+    get_total_energy_expenditure,
+    get_total_energy_expenditures,
+)
+from .catalog import FoodTable, get_foods_table, get_nutritional_bill
+from .composer import MealComposer
+from .models import Food, FoodGroup, FoodGroupIntake, MealSummary
+
+
+def create_food(food_group, name="Arroz blanco"):
+    return Food.objects.create(
+        name=name,
+        food_group=food_group,
+        calories=130,
+        cooked_half_portion=60,
+        raw_half_portion=25,
+        proteins=2.7,
+        fats=0.3,
+        carbohydrates=28,
+        home_measure_amount="1/2",
+    )
+
+
+# Foods the meal composer picks from, the other supergroups of the meal
+# summaries have no foods and are left out of the meals.
+COMPOSER_FOOD_FIELDS = [
+    "name",
+    "calories",
+    "proteins",
+    "fats",
+    "carbohydrates",
+]
+COMPOSER_FOODS = [
+    ("ENE", "Arroz blanco", 61.4, 2.7, 0.2, 32),
+    ("ENE", "Papa criolla", 50.2, 1.2, 0.1, 11.3),
+    ("PRO", "Pollo pechuga", 42.9, 8.3, 1.1, 0),
+    ("PRO", "Huevo de gallina", 74.4, 6.3, 5, 0.4),
+    ("FAV", "Banano", 54.1, 0.6, 0.1, 12.5),
+    ("FAV", "Brócoli", 14.1, 1.2, 0.2, 2),
+    ("HFA", "Aguacate Hass", 44.5, 0.5, 4.1, 2.1),
+    ("HFA", "Maní", 31, 1.4, 2.4, 0.8),
+]
+COMPOSER_SUPERGROUPS = ["ENE", "PRO", "FAV", "HFA"]
+
+
+def create_meal_summaries(upper_calorie_intake, diet=Diet.REGULAR):
+    for mealtime in MealSummary.MealTimes:
+        meal_summary = MealSummary.objects.create(
+            mealtime=mealtime,
+            diet=diet,
+            upper_calorie_intake=upper_calorie_intake,
+        )
+        for supergroup in FoodGroup.FoodSuperGroups:
+            FoodGroupIntake.objects.create(
+                meal_summary=meal_summary,
+                food_supergroup=supergroup,
+                intake=1.5,
+            )
+
+
+class MealComposerTestCase(TestCase):
+    intakes = {"ENE": 2, "PRO": 1.5, "FAV": 1, "HFA": 1}
+
+    def setUp(self):
+        self.foods_table = FoodTable(
+            [
+                (uuid4(), name, supergroup, *nutrients, 50, 25)
+                for supergroup, name, *nutrients in COMPOSER_FOODS
+            ]
+        )
+
+    def compose(self, targets):
+        """Return the error of the composed meal and of its greedy fill."""
+        targets = np.array(targets, dtype=float)
+        composer = MealComposer(self.foods_table)
+        _, filled = composer.fill(self.intakes, targets)
+
+        foods = composer.compose(self.intakes, targets)
+        portions = dict.fromkeys(self.intakes, 0)
+        for row, count in foods:
+            portions[self.foods_table.supergroups[row]] += count / 2
+        self.assertEqual(portions, self.intakes)
+
+        totals = sum(count * composer.nutrients[row] for row, count in foods)
+        return (
+            composer.get_errors(totals, targets),
+            composer.get_errors(filled, targets),
+        )
+
+    def test_reachable_targets_are_met(self):
+        # 1 portion of rice, potato, chicken and avocado, and half a
+        # portion of egg, banana and broccoli.
+        error, filled_error = self.compose([105.7, 33.5, 16.3])
+        self.assertLess(error, 1e-6)
+        self.assertGreater(filled_error, error)
+
+    def test_local_search_never_worsens_the_fill(self):
+        for targets in [[60, 40, 20], [120, 50, 30]]:
+            error, filled_error = self.compose(targets)
+            self.assertLessEqual(error, filled_error)
+            # Within 30% of the macronutrient grams on average.
+            self.assertLess(error, 3 * 0.3**2)
+
+        # Too much fats for the foods, the closest meal is still served.
+        error, filled_error = self.compose([30, 30, 30])
+        self.assertLessEqual(error, filled_error)
+
+
+class TotalEnergyExpenditureTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        variables = QuestionsToPlan.objects.create()
+        training_plan = TrainingPlan.objects.create()
+        create_cycling_plan(training_plan, variables, day=1, week=1)
+        create_cycling_plan(training_plan, variables, day=1, week=2)
+        create_cycling_plan(training_plan, variables, day=3, week=2)
+        create_physic_plan(training_plan, variables, day=2, week=1)
+        create_physic_plan(training_plan, variables, day=1, week=2)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_batch_matches_daily_calculation(self):
+        # Cycling, physic, both and no plans at all on the last day.
+        days = [(1, 1), (2, 1), (1, 2), (3, 2), (5, 4)]
+        (
+            total_energy_expenditures,
+            weight_goal_conclusion,
+        ) = get_total_energy_expenditures(self.user, days)
+
+        (
+            resting_energy_expenditure,
+            expected_weight_goal_conclusion,
+        ) = get_resting_energy_expenditure(self.user)
+        self.assertEqual(
+            weight_goal_conclusion, expected_weight_goal_conclusion
+        )
+        self.assertEqual(len(total_energy_expenditures), len(days))
+        for (day, week), total_energy_expenditure in zip(
+            days, total_energy_expenditures
+        ):
+            sports_requirement = get_sports_activity_requirement(
+                *fetch_daily_plans(self.user, day, week)
+            )
+            self.assertEqual(
+                total_energy_expenditure,
+                resting_energy_expenditure + sports_requirement,
+            )
+            self.assertEqual(
+                get_total_energy_expenditure(self.user, day, week),
+                (total_energy_expenditure, weight_goal_conclusion),
+            )
+
+        self.assertEqual(
+            total_energy_expenditures[-1], resting_energy_expenditure
+        )
+        for total_energy_expenditure in total_energy_expenditures[:-1]:
+            self.assertGreater(
+                total_energy_expenditure, resting_energy_expenditure
+            )
+
+
+class EnergySplitTestCase(TestCase):
+    def setUp(self):
+        get_energy_split.cache_clear()
+
+    def create_user(self, **profile):
+        return CustomUser(
+            **{
+                "gender": CustomUser.Genders.FEMALE,
+                "age": 30,
+                "height": 165,
+                "weight": 60,
+                "weight_goal": 58,
+                **profile,
+            }
+        )
+
+    def test_energy_split_is_memoized(self):
+        split = get_energy_split(self.create_user(), 500)
+        self.assertEqual(split, compute_energy_split(self.create_user(), 500))
+
+        # Another user with the same profile and training load.
+        self.assertIs(get_energy_split(self.create_user(), 500), split)
+        self.assertEqual(get_energy_split.cache_info()[:2], (1, 1))
+
+    def test_energy_split_follows_inputs(self):
+        split = get_energy_split(self.create_user(), 500)
+
+        heavier = get_energy_split(self.create_user(weight=62), 500)
+        self.assertEqual(
+            heavier, compute_energy_split(self.create_user(weight=62), 500)
+        )
+        self.assertNotEqual(heavier, split)
+
+        resting = get_energy_split(self.create_user(), 0)
+        self.assertAlmostEqual(
+            resting["total_daily_requirement"]["get"],
+            split["total_daily_requirement"]["get"] - 500,
+        )
+
+        info = get_energy_split.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 3, 3))
+
+
+class MealSummariesCatalogTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_meal_summaries(CalorieIntakeTiers.TIER_3)
+        create_meal_summaries(CalorieIntakeTiers.TIER_3, Diet.VEGAN)
+        create_meal_summaries(CalorieIntakeTiers.TIER_4)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_nutritional_bill_is_cached(self):
+        with self.assertNumQueries(2):
+            bill = get_nutritional_bill(
+                Diet.REGULAR, CalorieIntakeTiers.TIER_3
+            )
+
+        self.assertEqual(len(bill), len(MealSummary.MealTimes))
+        self.assertEqual(
+            len(bill[0]["food_group_intakes"]),
+            len(FoodGroup.FoodSuperGroups),
+        )
+        self.assertTrue(
+            all(meal_summary["diet"] == Diet.REGULAR for meal_summary in bill)
+        )
+
+        with self.assertNumQueries(0):
+            get_nutritional_bill(Diet.VEGAN, CalorieIntakeTiers.TIER_3)
+            get_nutritional_bill(Diet.VEGAN, CalorieIntakeTiers.TIER_7)
+
+    def test_nutritional_bill_follows_intakes(self):
+        get_nutritional_bill(Diet.REGULAR, CalorieIntakeTiers.TIER_4)
+        FoodGroupIntake.objects.filter(
+            meal_summary__upper_calorie_intake=CalorieIntakeTiers.TIER_4
+        ).update(intake=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            FoodGroupIntake.objects.first().save()
+
+        bill = get_nutritional_bill(Diet.REGULAR, CalorieIntakeTiers.TIER_4)
+        self.assertEqual(bill[0]["food_group_intakes"][0]["intake"], 3)
+
+
+class FoodTableTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.food_group = FoodGroup.objects.create(
+            supergroup=FoodGroup.FoodSuperGroups.ENERGETIC
+        )
+        cls.rice = create_food(cls.food_group)
+        cls.bread = create_food(cls.food_group, "Pan integral")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_foods_table(self):
+        with self.assertNumQueries(1):
+            foods_table = get_foods_table()
+
+        self.assertEqual(len(foods_table), 2)
+        self.assertEqual(foods_table.names, ["Arroz blanco", "Pan integral"])
+        self.assertEqual(
+            list(foods_table.supergroups),
+            [FoodGroup.FoodSuperGroups.ENERGETIC] * 2,
+        )
+
+        rows = foods_table.get_rows(
+            [self.rice.pk, self.rice.pk, uuid4(), self.bread.pk]
+        )
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            foods_table.sum(rows, ["calories", "cooked_half_portion"]),
+            {"calories": 390, "cooked_half_portion": 180},
+        )
+
+        with self.assertNumQueries(0):
+            get_foods_table()
+
+    def test_foods_table_follows_foods(self):
+        get_foods_table()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.bread.calories = 250
+            self.bread.save()
+            create_food(self.food_group, "Avena")
+
+            # Until the commit, the table is not reloaded.
+            with self.assertNumQueries(0):
+                self.assertEqual(len(get_foods_table()), 2)
+
+        for callback in callbacks:
+            callback()
+
+        foods_table = get_foods_table()
+        self.assertEqual(len(foods_table), 3)
+        self.assertEqual(
+            foods_table.columns["calories"][foods_table.index[self.bread.pk]],
+            250,
+        )
+
+
+class FoodSearchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        food_group = FoodGroup.objects.create()
+        for name in [
+            "Plátano maduro",
+            "Plátano verde",
+            "Arroz blanco",
+            "Leche de almendras",
+            "Ñame",
+        ]:
+            create_food(food_group, name)
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        foods_table = get_foods_table()
+        return [foods_table.names[row] for row in foods_table.search(query)]
+
+    def test_search_ignores_accents_and_case(self):
+        self.assertEqual(
+            self.search("PLATANO"), ["Plátano maduro", "Plátano verde"]
+        )
+        self.assertEqual(self.search("ñam"), ["Ñame"])
+        self.assertEqual(self.search("name"), ["Ñame"])
+
+    def test_search_ranking(self):
+        self.assertEqual(self.search("plátano v")[0], "Plátano verde")
+        self.assertEqual(self.search("almen"), ["Leche de almendras"])
+        self.assertEqual(self.search("arroz"), ["Arroz blanco"])
+        # Typos still match most of the query trigrams.
+        self.assertEqual(self.search("platno")[0], "Plátano maduro")
+
+    def test_search_without_matches(self):
+        self.assertEqual(self.search(""), [])
+        self.assertEqual(self.search("¿?"), [])
+        self.assertEqual(self.search("pescado"), [])
+
+
+class FoodViewSetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        food_group = FoodGroup.objects.create()
+        # Names ordered the same under every collation.
+        for name in ["Banano", "Arroz blanco", "Zanahoria"]:
+            create_food(food_group, name)
+        cls.staff_user = CustomUser.objects.create(
+            email="staff@elsa360.com",
+            username="staff",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_staff=True,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff_user)
+
+    def test_foods_are_paginated_by_cursor(self):
+        response = self.client.get(reverse("foods-list"), {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [food["name"] for food in response.data["results"]],
+            ["Arroz blanco", "Banano"],
+        )
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [food["name"] for food in response.data["results"]],
+            ["Zanahoria"],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_sparse_fields(self):
+        response = self.client.get(
+            reverse("foods-list"), {"fields": "name,calories"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0],
+            {"name": "Arroz blanco", "calories": 130},
+        )
+
+        response = self.client.get(
+            reverse("foods-list"), {"fields": "name,password"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flat_group(self):
+        response = self.client.get(
+            reverse("foods-list"),
+            {"flat_group": "true", "fields": "name,supergroup,group"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0],
+            {"name": "Arroz blanco", "supergroup": "ENE", "group": "CER"},
+        )
+
+        response = self.client.get(reverse("foods-list"))
+        self.assertEqual(
+            response.data["results"][0]["food_group"]["supergroup"], "ENE"
+        )
+
+
+class CatalogSnapshotTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_meal_summaries(CalorieIntakeTiers.TIER_3)
+        cls.food = create_food(FoodGroup.objects.create())
+        cls.staff_user = CustomUser.objects.create(
+            email="staff@elsa360.com",
+            username="staff",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_staff=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff_user)
+
+    def get_snapshot(self, **headers):
+        return self.client.get(
+            reverse("nutrition_catalog"),
+            HTTP_ACCEPT_ENCODING="gzip, deflate",
+            **headers,
+        )
+
+    def test_snapshot_is_precompressed(self):
+        response = self.get_snapshot()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        tables = json.loads(gzip.decompress(response.content))
+        self.assertEqual(
+            [food["name"] for food in tables["foods"]], ["Arroz blanco"]
+        )
+        self.assertEqual(len(tables["food_groups"]), 1)
+        self.assertEqual(
+            len(tables["meal_summaries"]), len(MealSummary.MealTimes)
+        )
+        self.assertEqual(
+            len(tables["food_group_intakes"]),
+            FoodGroupIntake.objects.count(),
+        )
+
+        # Clients not accepting gzip get the plain JSON.
+        response = self.client.get(reverse("nutrition_catalog"))
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(json.loads(response.content), tables)
+
+    def test_snapshot_version(self):
+        etag = self.get_snapshot()["ETag"]
+        response = self.get_snapshot(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # The version only changes with the content of the tables.
+        cache.clear()
+        self.assertEqual(self.get_snapshot()["ETag"], etag)
+
+        self.food.calories = 111
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food.save()
+        response = self.get_snapshot(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_snapshot_encodings(self):
+        etag = self.get_snapshot()["ETag"]
+
+        # Refused gzip gets the plain JSON under its own ETag.
+        for accept_encoding in ("gzip;q=0", "gzip;q=0, *", "identity"):
+            response = self.client.get(
+                reverse("nutrition_catalog"),
+                HTTP_ACCEPT_ENCODING=accept_encoding,
+                HTTP_IF_NONE_MATCH=etag,
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("Content-Encoding", response)
+            self.assertNotEqual(response["ETag"], etag)
+
+        for accept_encoding in ("deflate, GZIP;q=0.5", "*"):
+            response = self.client.get(
+                reverse("nutrition_catalog"),
+                HTTP_ACCEPT_ENCODING=accept_encoding,
+                HTTP_IF_NONE_MATCH=etag,
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_304_NOT_MODIFIED
+            )
+
+
+class NutritionQueryBudgetsTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_cycling_plan(
+            TrainingPlan.objects.create(), QuestionsToPlan.objects.create()
+        )
+        create_meal_summaries(CalorieIntakeTiers.TIER_3)
+        cls.food_group = FoodGroup.objects.create()
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+        cls.staff_user = CustomUser.objects.create(
+            email="staff@elsa360.com",
+            username="staff",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_staff=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_daily_nutritional_plan_budget(self):
+        with self.assertQueryBudget("DailyNutritionalPlanView", "get"):
+            response = self.client.get(reverse("nutrition_daily"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            len(response.data["nutritional_bill"]), len(MealSummary.MealTimes)
+        )
+
+    def test_meal_composer_budget(self):
+        for supergroup, *food in COMPOSER_FOODS:
+            food_group, _ = FoodGroup.objects.get_or_create(
+                supergroup=supergroup
+            )
+            Food.objects.create(
+                food_group=food_group,
+                cooked_half_portion=50,
+                raw_half_portion=25,
+                home_measure_amount="1",
+                **dict(zip(COMPOSER_FOOD_FIELDS, food)),
+            )
+
+        with self.assertQueryBudget("MealComposerView", "get"):
+            response = self.client.get(reverse("nutrition_compose"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        meals = response.data["meals"]
+        self.assertEqual(len(meals), len(MealSummary.MealTimes))
+        for meal in meals:
+            # Every intake of 1.5 portions is served in half portions.
+            portions = dict.fromkeys(COMPOSER_SUPERGROUPS, 0)
+            for food in meal["foods"]:
+                portions[food["supergroup"]] += food["portions"]
+            self.assertEqual(
+                portions, dict.fromkeys(COMPOSER_SUPERGROUPS, 1.5)
+            )
+
+        # The day does not serve the same foods at every meal.
+        self.assertGreater(
+            len({food["id"] for meal in meals for food in meal["foods"]}),
+            len(meals[0]["foods"]),
+        )
+
+        etag = response["ETag"]
+        response = self.client.get(
+            reverse("nutrition_compose"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_catalog_snapshot_budget(self):
+        with self.assertQueryBudget("CatalogSnapshotView", "get"):
+            response = self.client.get(reverse("nutrition_catalog"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_nutritional_plan_budget(self):
+        # The training plans come from the plans catalog.
+        self.client.get(reverse("nutrition_daily"))
+
+        with self.assertQueryBudget("NutritionalPlanView", "get"):
+            response = self.client.get(reverse("nutrition_plan"), {"days": 28})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["days"]), 28)
+
+    def test_nutritional_plan_matches_daily_plan(self):
+        daily = self.client.get(reverse("nutrition_daily")).data
+        plan = self.client.get(reverse("nutrition_plan")).data
+        today, tomorrow = plan["days"][:2]
+
+        requirement = daily["total_daily_requirement"]
+        self.assertEqual(today["tee"], requirement["get"])
+        for macronutrient in ["carbohydrates", "protein", "fats"]:
+            self.assertAlmostEqual(
+                today[f"{macronutrient}_grams"],
+                requirement[f"{macronutrient}_grams"],
+                delta=0.01,
+            )
+        self.assertEqual(
+            dict(zip(plan["meals"], today["meals_kcal"])),
+            {
+                meal: data["total_kcal"]
+                for meal, data in daily["meal_distribution"].items()
+            },
+        )
+        self.assertEqual(
+            today["upper_calorie_intake"], CalorieIntakeTiers.TIER_3
+        )
+        self.assertEqual(plan["liquid_requirement"], 2.62)
+
+        # There is no training planned for the second day.
+        self.assertEqual((tomorrow["day"], tomorrow["week"]), (2, 1))
+        self.assertLess(tomorrow["tee"], today["tee"])
+
+    def test_nutritional_plan_days(self):
+        for days in ["0", "32", "week"]:
+            response = self.client.get(
+                reverse("nutrition_plan"), {"days": days}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_daily_nutritional_bill_budget(self):
+        foods = [create_food(self.food_group) for _ in range(3)]
+        food_ids = ",".join(str(food.pk) for food in foods)
+        params = {"BREAKFAST": food_ids, "LUNCH": food_ids, "DINNER": ""}
+
+        with self.assertQueryBudget(
+            "DailyNutritionalBillCalculationsView", "get"
+        ):
+            response = self.client.get(reverse("nutrition_intake"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "total_calories": 780,
+                "total_proteins": 16.2,
+                "total_fats": 1.8,
+                "total_carbohydrates": 168,
+                "BREAKFAST": 390,
+                "LUNCH": 390,
+            },
+        )
+
+        # A food listed twice is counted twice.
+        data = {
+            "BREAKFAST": [str(foods[0].pk), str(foods[0].pk)],
+            "LUNCH": [str(food.pk) for food in foods],
+        }
+        with self.assertQueryBudget(
+            "DailyNutritionalBillCalculationsView", "post"
+        ):
+            response = self.client.post(
+                reverse("nutrition_intake"), data, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["BREAKFAST"], 260)
+        self.assertEqual(response.data["total_calories"], 650)
+
+    def test_daily_nutritional_bill_invalid_food(self):
+        response = self.client.get(
+            reverse("nutrition_intake"), {"BREAKFAST": "arroz"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            reverse("nutrition_intake"), ["arroz"], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_food_search_budget(self):
+        create_food(self.food_group, "Plátano maduro")
+
+        with self.assertQueryBudget("FoodViewSet", "search"):
+            response = self.client.get(
+                reverse("foods-search"), {"q": "platano"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["name"], "Plátano maduro")
+        self.assertEqual(response.data[0]["calories"], 130)
+
+    def test_foods_budgets(self):
+        self.client.force_authenticate(self.staff_user)
+        self.assertViewSetBudgets(
+            "FoodViewSet", "foods", lambda: create_food(self.food_group)
+        )
+
+        # The nested food group is read-only, so foods can not be created
+        # through the API, the create action is left unchecked.
+        data = {
+            "name": "Arroz integral",
+            "calories": 111,
+            "cooked_half_portion": 60,
+            "raw_half_portion": 25,
+            "proteins": 2.6,
+            "fats": 0.9,
+            "carbohydrates": 23,
+            "home_measure_amount": "1/2",
+            "home_measure_type": Food.HomeMeasures.CUP,
+        }
+        detail_url = reverse(
+            "foods-detail", args=[create_food(self.food_group).pk]
+        )
+        with self.assertQueryBudget("FoodViewSet", "update"):
+            response = self.client.put(detail_url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertQueryBudget("FoodViewSet", "partial_update"):
+            response = self.client.patch(detail_url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-# Create your tests here.
+        with self.assertQueryBudget("FoodViewSet", "destroy"):
+            response = self.client.delete(detail_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
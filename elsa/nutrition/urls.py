@@ -15,6 +15,21 @@ urlpatterns = [
         views.DailyNutritionalPlanView.as_view(),
         name="nutrition_daily",
     ),
+    path(
+        "nutrition/plan/",
+        views.NutritionalPlanView.as_view(),
+        name="nutrition_plan",
+    ),
+    path(
+        "nutrition/compose/",
+        views.MealComposerView.as_view(),
+        name="nutrition_compose",
+    ),
+    path(
+        "nutrition/catalog/",
+        views.CatalogSnapshotView.as_view(),
+        name="nutrition_catalog",
+    ),
     path(
         "nutrition/intake/",
         views.DailyNutritionalBillCalculationsView.as_view(),
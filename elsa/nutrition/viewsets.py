@@ -1,15 +1,39 @@
 from knox.auth import TokenAuthentication
 
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from elsa.commons.authentication import IsAdminOrHasMembership
+from elsa.commons.sync import DeltaSyncMixin
+
+from .catalog import get_foods_table
 from .models import Food
+from .pagination import FoodCursorPagination
 from .serializers import FoodSerializer
 
 
-class FoodViewSet(ModelViewSet):
-    """ViewSet for Food model CRUD."""
+class FoodViewSet(DeltaSyncMixin, ModelViewSet):
+    """ViewSet for Food model CRUD. The foods are listed by pages of a
+    cursor, '?fields=' picks the fields to serialize, '?flat_group='
+    gives the food group as flat fields and '?updated_since=' lists the
+    changes of a delta sync."""
 
     authentication_classes = [TokenAuthentication]
     serializer_class = FoodSerializer
-    queryset = Food.objects.all()
+    queryset = Food.objects.select_related("food_group")
+    pagination_class = FoodCursorPagination
     filterset_fields = ["food_group__group"]
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated, IsAdminOrHasMembership],
+    )
+    def search(self, request):
+        """Accent and case insensitive search of the foods by name, served
+        from the foods table for autocomplete."""
+        foods_table = get_foods_table()
+        rows = foods_table.search(request.query_params.get("q", ""))
+
+        return Response([foods_table.get_food(row) for row in rows])
@@ -1,6 +1,14 @@
 from django.db.models import Sum
 
-from .models import MoodProfileAnswer
+from .models import (
+    BorghEffortScale,
+    HamiltonQuestion,
+    IrrationalBeliefQuestionaire,
+    MoodProfileAnswer,
+    PsychologicalInventoryQuestionaire,
+    PsychologicalQuestion,
+    PsychologicalTechnique,
+)
 
 
 def get_feelings_sum(feelings):
@@ -11,3 +19,68 @@ def get_feelings_sum(feelings):
         sum = answers_qs.aggregate(Sum("intensity"))["intensity__sum"]
 
     return sum
+
+
+def get_daily_psychological_plan(current_day, current_week):
+    """Return the psychological plan of the given relative day and week."""
+    # The serializers depend on this module.
+    from .serializers import (
+        BorghEfforScaleSerializer,
+        HamiltonQuestionSerializer,
+        IrrationalBeliefQuestionaireSerializer,
+        PsychologicalInventoryQuestionaireSerializer,
+        PsychologicalQuestionSerializer,
+        PsychologicalTechniqueSerializer,
+    )
+
+    questions_qs = PsychologicalQuestion.objects.filter(
+        day=current_day, week=current_week
+    )
+    beliefs_qs = IrrationalBeliefQuestionaire.objects.filter(
+        day=current_day, week=current_week
+    ).first()
+    inventory_qs = PsychologicalInventoryQuestionaire.objects.filter(
+        day=current_day, week=current_week
+    )
+
+    borgh_qs = BorghEffortScale.objects.all()
+
+    psy_techniques = [
+        technique
+        for technique in list(PsychologicalTechnique.objects.all())
+        if technique.display_today(current_week, current_day)
+    ]
+
+    questions_serializer = PsychologicalQuestionSerializer(
+        questions_qs, many=True
+    )
+    beliefs_serializer = IrrationalBeliefQuestionaireSerializer(beliefs_qs)
+    inventory_serializer = PsychologicalInventoryQuestionaireSerializer(
+        inventory_qs, many=True
+    )
+    borgh_serializer = BorghEfforScaleSerializer(borgh_qs, many=True)
+    techniques_serializer = PsychologicalTechniqueSerializer(
+        psy_techniques, many=True
+    )
+
+    mood_states = []
+    mood_states_display_days = [(2, 1), (3, 2), (4, 1), (5, 1)]
+    if (current_week, current_day) in mood_states_display_days:
+        mood_states = MoodProfileAnswer.Feelings.choices
+
+    hamilton_qs = []
+    hamilton_display_days = [(2, 2), (3, 1), (4, 2), (5, 2)]
+    if (current_week, current_day) in hamilton_display_days:
+        hamilton_qs = HamiltonQuestion.objects.all()
+
+    hamilton_serializer = HamiltonQuestionSerializer(hamilton_qs, many=True)
+
+    return {
+        "regular_questions": questions_serializer.data,
+        "beliefs_questionaire": beliefs_serializer.data,
+        "psy_inventory": inventory_serializer.data,
+        "borgh_scale": borgh_serializer.data,
+        "techniques": techniques_serializer.data,
+        "mood_states": mood_states,
+        "hamilton": hamilton_serializer.data,
+    }
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PsychologyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "elsa.psychology"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psychology', '0017_rename_psycologicalquestionanswer_psychologicalquestionanswer'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='irrationalbeliefquestionaire',
+            index=models.Index(fields=['week', 'day'], name='psychology__week_d85402_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychologicalinventoryquestionaire',
+            index=models.Index(fields=['week', 'day'], name='psychology__week_9c58ac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychologicalquestion',
+            index=models.Index(fields=['week', 'day'], name='psychology__week_b01bc7_idx'),
+        ),
+    ]
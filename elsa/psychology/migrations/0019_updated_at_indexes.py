@@ -0,0 +1,65 @@
+# Generated by Django 4.0.5 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psychology', '0018_questions_week_day_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borghsummary',
+            index=models.Index(fields=['user', 'updated_at'], name='psychology__user_id_fd739c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hamiltonquestionanswer',
+            index=models.Index(fields=['summary', 'updated_at'], name='psychology__summary_cc6a59_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hamiltonsummary',
+            index=models.Index(fields=['user', 'updated_at'], name='psychology__user_id_3ff8f2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='irrationalbeliefanswer',
+            index=models.Index(fields=['summary', 'updated_at'], name='psychology__summary_7ed32f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='irrationalbeliefquestionaire',
+            index=models.Index(fields=['updated_at'], name='psychology__updated_e6409f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='irrationalbeliefsummary',
+            index=models.Index(fields=['user', 'updated_at'], name='psychology__user_id_1ef521_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moodprofileanswer',
+            index=models.Index(fields=['summary', 'updated_at'], name='psychology__summary_078d75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moodprofilesummary',
+            index=models.Index(fields=['user', 'updated_at'], name='psychology__user_id_273111_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychologicalinventoryanswer',
+            index=models.Index(fields=['summary', 'updated_at'], name='psychology__summary_42ef68_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychologicalinventoryquestionaire',
+            index=models.Index(fields=['updated_at'], name='psychology__updated_3d3842_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychologicalinventorysummary',
+            index=models.Index(fields=['user', 'updated_at'], name='psychology__user_id_24f521_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychologicalplansummary',
+            index=models.Index(fields=['user', 'updated_at'], name='psychology__user_id_dab644_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychologicalquestion',
+            index=models.Index(fields=['updated_at'], name='psychology__updated_295a6b_idx'),
+        ),
+    ]
@@ -21,6 +21,12 @@ class PsychologicalQuestion(UUIDPrimaryKeyModel, TimeStampedModel):
         to="self", on_delete=models.SET_NULL, null=True, blank=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["week", "day"]),
+            models.Index(fields=["updated_at"]),
+        ]
+
 
 class PsychologicalPlanSummary(UUIDPrimaryKeyModel, TimeStampedModel):
     """Represents a psychological plan's period of activity."""
@@ -32,6 +38,9 @@ class PsychologicalPlanSummary(UUIDPrimaryKeyModel, TimeStampedModel):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "updated_at"])]
+
 
 class PsychologicalQuestionAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
     """Represents an answer for a regular question."""
@@ -101,6 +110,12 @@ class IrrationalBeliefQuestionaire(UUIDPrimaryKeyModel, TimeStampedModel):
     summary_description = models.TextField()
     summary_scales = models.ManyToManyField(to=IrrationalBeliefScale)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["week", "day"]),
+            models.Index(fields=["updated_at"]),
+        ]
+
 
 class IrrationalBeliefQuestion(UUIDPrimaryKeyModel, TimeStampedModel):
     questionaire = models.ForeignKey(
@@ -122,6 +137,9 @@ class IrrationalBeliefSummary(UUIDPrimaryKeyModel, TimeStampedModel):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "updated_at"])]
+
 
 class IrrationalBeliefAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
     class Answers(models.TextChoices):
@@ -142,6 +160,9 @@ class IrrationalBeliefAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
         validators=[MinValueValidator(0), MaxValueValidator(6)]
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["summary", "updated_at"])]
+
 
 class PsychologicalInventoryQuestionaire(
     UUIDPrimaryKeyModel, TimeStampedModel
@@ -154,6 +175,12 @@ class PsychologicalInventoryQuestionaire(
     description = models.TextField()
     summary_description = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["week", "day"]),
+            models.Index(fields=["updated_at"]),
+        ]
+
 
 class PsychologicalInventoryQuestion(UUIDPrimaryKeyModel, TimeStampedModel):
     questionaire = models.ForeignKey(
@@ -175,6 +202,9 @@ class PsychologicalInventorySummary(UUIDPrimaryKeyModel, TimeStampedModel):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "updated_at"])]
+
 
 class PsychologicalInventoryAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
     class Answers(models.IntegerChoices):
@@ -193,6 +223,9 @@ class PsychologicalInventoryAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
         choices=Answers.choices, default=Answers.SOMETIMES
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["summary", "updated_at"])]
+
 
 class BorghEffortScale(UUIDPrimaryKeyModel, TimeStampedModel):
     class BorghScale(models.TextChoices):
@@ -221,6 +254,9 @@ class BorghSummary(UUIDPrimaryKeyModel, TimeStampedModel):
     )
     answer = models.ForeignKey(to=BorghEffortScale, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "updated_at"])]
+
 
 class HamiltonQuestion(UUIDPrimaryKeyModel, TimeStampedModel):
     number = models.IntegerField(
@@ -235,6 +271,9 @@ class HamiltonSummary(UUIDPrimaryKeyModel, TimeStampedModel):
         to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "updated_at"])]
+
 
 class HamiltonQuestionAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
     class HamiltonScale(models.IntegerChoices):
@@ -255,6 +294,7 @@ class HamiltonQuestionAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
 
     class Meta:
         unique_together = ["question", "summary"]
+        indexes = [models.Index(fields=["summary", "updated_at"])]
 
 
 class MoodProfileSummary(UUIDPrimaryKeyModel, TimeStampedModel):
@@ -262,6 +302,9 @@ class MoodProfileSummary(UUIDPrimaryKeyModel, TimeStampedModel):
         to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "updated_at"])]
+
 
 class MoodProfileAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
     class Feelings(models.TextChoices):
@@ -353,6 +396,9 @@ class MoodProfileAnswer(UUIDPrimaryKeyModel, TimeStampedModel):
         else:
             return self.intensity
 
+    class Meta:
+        indexes = [models.Index(fields=["summary", "updated_at"])]
+
 
 class PsychologicalTechnique(UUIDPrimaryKeyModel, TimeStampedModel):
     class Types(models.TextChoices):
@@ -0,0 +1,72 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from elsa.commons.catalogs import bump_catalog_version_on_commit
+from elsa.commons.sync import track_deletions
+
+from .models import (
+    BorghEffortScale,
+    BorghSummary,
+    HamiltonQuestion,
+    HamiltonQuestionAnswer,
+    HamiltonSummary,
+    IrrationalBeliefAnswer,
+    IrrationalBeliefQuestion,
+    IrrationalBeliefQuestionaire,
+    IrrationalBeliefScale,
+    IrrationalBeliefSummary,
+    MoodProfileAnswer,
+    MoodProfileSummary,
+    PsychologicalInventoryAnswer,
+    PsychologicalInventoryQuestion,
+    PsychologicalInventoryQuestionaire,
+    PsychologicalInventorySummary,
+    PsychologicalPlanSummary,
+    PsychologicalQuestion,
+    PsychologicalTechnique,
+)
+
+PSYCHOLOGY_CATALOG_MODELS = [
+    BorghEffortScale,
+    HamiltonQuestion,
+    IrrationalBeliefQuestion,
+    IrrationalBeliefQuestionaire,
+    IrrationalBeliefScale,
+    PsychologicalInventoryQuestion,
+    PsychologicalInventoryQuestionaire,
+    PsychologicalQuestion,
+    PsychologicalTechnique,
+]
+
+
+def invalidate_psychology_catalog(sender, **kwargs):
+    bump_catalog_version_on_commit("psychology")
+
+
+for model in PSYCHOLOGY_CATALOG_MODELS:
+    post_save.connect(invalidate_psychology_catalog, sender=model)
+    post_delete.connect(invalidate_psychology_catalog, sender=model)
+
+m2m_changed.connect(
+    invalidate_psychology_catalog,
+    sender=IrrationalBeliefQuestionaire.summary_scales.through,
+)
+
+# Rows served by the delta syncs, by the lookup of the user owning them.
+SYNCED_MODELS = {
+    PsychologicalQuestion: None,
+    IrrationalBeliefQuestionaire: None,
+    PsychologicalInventoryQuestionaire: None,
+    PsychologicalPlanSummary: "user",
+    IrrationalBeliefSummary: "user",
+    IrrationalBeliefAnswer: "summary__user",
+    PsychologicalInventorySummary: "user",
+    PsychologicalInventoryAnswer: "summary__user",
+    BorghSummary: "user",
+    HamiltonSummary: "user",
+    HamiltonQuestionAnswer: "summary__user",
+    MoodProfileSummary: "user",
+    MoodProfileAnswer: "summary__user",
+}
+
+for model, owner in SYNCED_MODELS.items():
+    track_deletions(model, owner)
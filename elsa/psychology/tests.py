@@ -1,3 +1,338 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from elsa.commons.testing import QueryBudgetMixin
+from elsa.memberships.models import Membership
+from elsa.users.models import CustomUser
+
+from .models import (
+    BorghEffortScale,
+    BorghSummary,
+    HamiltonQuestion,
+    HamiltonQuestionAnswer,
+    HamiltonSummary,
+    IrrationalBeliefAnswer,
+    IrrationalBeliefQuestion,
+    IrrationalBeliefQuestionaire,
+    IrrationalBeliefScale,
+    IrrationalBeliefSummary,
+    MoodProfileAnswer,
+    MoodProfileSummary,
+    PsychologicalInventoryAnswer,
+    PsychologicalInventoryQuestion,
+    PsychologicalInventoryQuestionaire,
+    PsychologicalInventorySummary,
+    PsychologicalPlanSummary,
+    PsychologicalQuestion,
+    PsychologicalQuestionAnswer,
+    PsychologicalTechnique,
+)
+
+
+def create_belief_questionaire():
+    questionaire = IrrationalBeliefQuestionaire.objects.create(
+        week=1, title="Creencias", description="", summary_description=""
+    )
+    questionaire.summary_scales.add(
+        IrrationalBeliefScale.objects.create(lower_limit=3, upper_limit=21),
+        IrrationalBeliefScale.objects.create(lower_limit=22, upper_limit=42),
+    )
+    for number in range(1, 4):
+        IrrationalBeliefQuestion.objects.create(
+            questionaire=questionaire, number=number, description=""
+        )
+
+    return questionaire
+
+
+def create_inventory_questionaire():
+    questionaire = PsychologicalInventoryQuestionaire.objects.create(
+        week=1, title="Inventario", description="", summary_description=""
+    )
+    for number in range(1, 4):
+        PsychologicalInventoryQuestion.objects.create(
+            questionaire=questionaire, number=number, description=""
+        )
+
+    return questionaire
+
+
+class PsychologyQueryBudgetsTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+        cls.staff_user = CustomUser.objects.create(
+            email="staff@elsa360.com",
+            username="staff",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_staff=True,
+        )
+        cls.question = PsychologicalQuestion.objects.create(
+            week=1, description=""
+        )
+        cls.borgh_scale = BorghEffortScale.objects.create(
+            description="", lower_rpe=0, higher_rpe=2
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_belief_summary(self):
+        summary = IrrationalBeliefSummary.objects.create(
+            user=self.user, questionaire=create_belief_questionaire()
+        )
+        for _ in range(3):
+            IrrationalBeliefAnswer.objects.create(
+                summary=summary, answer="SA", intensity=3
+            )
+
+        return summary
+
+    def create_inventory_summary(self):
+        summary = PsychologicalInventorySummary.objects.create(
+            user=self.user, questionaire=create_inventory_questionaire()
+        )
+        for _ in range(3):
+            PsychologicalInventoryAnswer.objects.create(summary=summary)
+
+        return summary
+
+    def create_hamilton_answer(self, summary):
+        return HamiltonQuestionAnswer.objects.create(
+            summary=summary,
+            question=HamiltonQuestion.objects.create(
+                number=1, title="Humor ansioso", description=""
+            ),
+            answer=HamiltonQuestionAnswer.HamiltonScale.MILD,
+        )
+
+    def create_hamilton_summary(self):
+        summary = HamiltonSummary.objects.create(user=self.user)
+        for _ in range(3):
+            self.create_hamilton_answer(summary)
+
+        return summary
+
+    def create_mood_summary(self):
+        summary = MoodProfileSummary.objects.create(user=self.user)
+        for feeling in MoodProfileAnswer.Feelings.values[:3]:
+            MoodProfileAnswer.objects.create(summary=summary, feeling=feeling)
+
+        return summary
+
+    def test_daily_psychological_plan_budget(self):
+        with self.assertQueryBudget("DailyPsychologicalPlanView", "get"):
+            response = self.client.get(reverse("psychology_daily"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_psychology_lists_budgets(self):
+        self.assertListBudget(
+            "BorghScaleView",
+            reverse("psychology_borgh"),
+            lambda: BorghEffortScale.objects.create(
+                description="", lower_rpe=0, higher_rpe=2
+            ),
+            action="get",
+        )
+        self.assertListBudget(
+            "HamiltonQuestionView",
+            reverse("psychology_hamilton"),
+            lambda: HamiltonQuestion.objects.create(
+                number=1, title="Humor ansioso", description=""
+            ),
+            action="get",
+        )
+        self.assertListBudget(
+            "PsychologicalTechniqueListView",
+            reverse("psychology_techniques"),
+            lambda: PsychologicalTechnique.objects.create(
+                title="Respiración", description=""
+            ),
+            action="get",
+        )
+
+        with self.assertQueryBudget("MoodFeelingsListView", "get"):
+            response = self.client.get(reverse("psychology_feelings"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_psychological_summaries_budgets(self):
+        now = datetime.now(timezone.utc)
+        self.assertViewSetBudgets(
+            "PsychologicalSummaryViewSet",
+            "psychology_plan_summaries",
+            lambda: PsychologicalPlanSummary.objects.create(
+                user=self.user, start_date=now, end_date=now
+            ),
+            {
+                "user": self.user.pk,
+                "start_date": now,
+                "end_date": now + timedelta(days=90),
+            },
+        )
+
+    def test_psychological_questions_budgets(self):
+        self.assertViewSetBudgets(
+            "PsychologicalQuestionViewSet",
+            "psychology_questions",
+            lambda: PsychologicalQuestion.objects.create(
+                week=1, description=""
+            ),
+        )
+
+    def test_psychological_answers_budgets(self):
+        # The answers are not linked to their users, only the staff can
+        # list them.
+        self.client.force_authenticate(self.staff_user)
+        self.assertViewSetBudgets(
+            "PsychologicalQuestionAnswerViewset",
+            "psychology_answers",
+            lambda: PsychologicalQuestionAnswer.objects.create(
+                question=self.question, string_answer="Bien"
+            ),
+            {"question": self.question.pk, "string_answer": "Bien"},
+        )
+
+        data = [
+            {"question": self.question.pk, "string_answer": "Bien"}
+            for _ in range(5)
+        ]
+        with self.assertQueryBudget(
+            "PsychologicalQuestionAnswerViewset", "batch_create", len(data)
+        ):
+            response = self.client.post(
+                reverse("psychology_answers-batch-create"), data, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_irrational_beliefs_questionaires_budgets(self):
+        self.assertViewSetBudgets(
+            "IrrationalBeliefsQuestionaireViewSet",
+            "psychology_beliefs_questionaires",
+            create_belief_questionaire,
+        )
+
+    def test_irrational_beliefs_summaries_budgets(self):
+        questionaire = create_belief_questionaire()
+        self.assertViewSetBudgets(
+            "IrrationalBeliefsSummaryViewSet",
+            "psychology_beliefs_summaries",
+            self.create_belief_summary,
+            {
+                "user": self.user.pk,
+                "questionaire": questionaire.pk,
+                "answers": [],
+            },
+        )
+
+    def test_irrational_beliefs_answers_budgets(self):
+        summary = IrrationalBeliefSummary.objects.create(
+            user=self.user, questionaire=create_belief_questionaire()
+        )
+        self.assertViewSetBudgets(
+            "IrrationalBeliefsAnswerViewSet",
+            "psychology_beliefs_answers",
+            lambda: IrrationalBeliefAnswer.objects.create(
+                summary=summary, answer="SA", intensity=3
+            ),
+            {"summary": summary.pk, "answer": "SA", "intensity": 3},
+        )
+
+    def test_psychological_inventory_questionaires_budgets(self):
+        self.assertViewSetBudgets(
+            "PsychologicalInventoryQuestionaireViewSet",
+            "psychology_inventory_questionaires",
+            create_inventory_questionaire,
+        )
+
+    def test_psychological_inventory_summaries_budgets(self):
+        questionaire = create_inventory_questionaire()
+        self.assertViewSetBudgets(
+            "PsychologicalInventorySummaryViewSet",
+            "psychology_inventory_summaries",
+            self.create_inventory_summary,
+            {"user": self.user.pk, "questionaire": questionaire.pk},
+        )
+
+    def test_psychological_inventory_answers_budgets(self):
+        summary = PsychologicalInventorySummary.objects.create(
+            user=self.user, questionaire=create_inventory_questionaire()
+        )
+        self.assertViewSetBudgets(
+            "PsychologicalInventoryAnswerViewSet",
+            "psychology_inventory_answers",
+            lambda: PsychologicalInventoryAnswer.objects.create(
+                summary=summary
+            ),
+            {"summary": summary.pk, "answer": 4},
+        )
+
+    def test_borgh_summaries_budgets(self):
+        self.assertViewSetBudgets(
+            "BorghSummaryViewSet",
+            "psychology_borgh_summaries",
+            lambda: BorghSummary.objects.create(
+                user=self.user, answer=self.borgh_scale
+            ),
+            {"user": self.user.pk, "answer": self.borgh_scale.pk},
+        )
+
+    def test_hamilton_summaries_budgets(self):
+        self.assertViewSetBudgets(
+            "HamiltonSummaryViewSet",
+            "psychology_hamilton_summaries",
+            self.create_hamilton_summary,
+            {"user": self.user.pk, "answers": []},
+        )
+
+    def test_hamilton_answers_budgets(self):
+        summary = HamiltonSummary.objects.create(user=self.user)
+        question = HamiltonQuestion.objects.create(
+            number=1, title="Humor ansioso", description=""
+        )
+        self.assertViewSetBudgets(
+            "HamiltonQuestionAnswerViewSet",
+            "psychology_hamilton_answers",
+            lambda: self.create_hamilton_answer(summary),
+            {
+                "summary": summary.pk,
+                "question": question.pk,
+                "answer": HamiltonQuestionAnswer.HamiltonScale.GRAVE,
+            },
+        )
+
+    def test_mood_profile_summaries_budgets(self):
+        self.assertViewSetBudgets(
+            "MoodProfileSummaryViewSet",
+            "psychology_mood_summaries",
+            self.create_mood_summary,
+            {"user": self.user.pk},
+        )
 
-# Create your tests here.
+    def test_mood_profile_answers_budgets(self):
+        summary = MoodProfileSummary.objects.create(user=self.user)
+        self.assertViewSetBudgets(
+            "MoodProfileAnswerViewSet",
+            "psychology_mood_answers",
+            lambda: MoodProfileAnswer.objects.create(summary=summary),
+            {"summary": summary.pk, "feeling": "TE", "intensity": 3},
+        )
@@ -97,7 +97,7 @@ urlpatterns = [
     path(
         "psychology/hamilton/",
         views.HamiltonQuestionView.as_view(),
-        name="psychology_borgh",
+        name="psychology_hamilton",
     ),
     path(
         "psychology/mood-feelings/",
@@ -1,4 +1,5 @@
 from elsa.commons.authentication import IsAdminOrHasMembership
+from elsa.commons.sync import DeltaSyncMixin
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -39,7 +40,7 @@ from .serializers import (
 )
 
 
-class PsychologicalSummaryViewSet(ModelViewSet):
+class PsychologicalSummaryViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = PsychologicalSummarySerializer
 
@@ -55,7 +56,7 @@ class PsychologicalSummaryViewSet(ModelViewSet):
             )
 
 
-class PsychologicalQuestionViewSet(ReadOnlyModelViewSet):
+class PsychologicalQuestionViewSet(DeltaSyncMixin, ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     queryset = PsychologicalQuestion.objects.all()
     serializer_class = PsychologicalQuestionSerializer
@@ -82,16 +83,18 @@ class PsychologicalQuestionAnswerViewset(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class IrrationalBeliefsQuestionaireViewSet(ReadOnlyModelViewSet):
+class IrrationalBeliefsQuestionaireViewSet(
+    DeltaSyncMixin, ReadOnlyModelViewSet
+):
     permission_classes = [IsAuthenticated]
     queryset = IrrationalBeliefQuestionaire.objects.all()
     serializer_class = IrrationalBeliefQuestionaireSerializer
 
 
-class IrrationalBeliefsSummaryViewSet(ModelViewSet):
+class IrrationalBeliefsSummaryViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = IrrationalBeliefSummarySerializer
 
@@ -107,7 +110,7 @@ class IrrationalBeliefsSummaryViewSet(ModelViewSet):
             )
 
 
-class IrrationalBeliefsAnswerViewSet(ModelViewSet):
+class IrrationalBeliefsAnswerViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = IrrationalBeliefAnswerSerializer
 
@@ -123,13 +126,15 @@ class IrrationalBeliefsAnswerViewSet(ModelViewSet):
             )
 
 
-class PsychologicalInventoryQuestionaireViewSet(ReadOnlyModelViewSet):
+class PsychologicalInventoryQuestionaireViewSet(
+    DeltaSyncMixin, ReadOnlyModelViewSet
+):
     permission_classes = [IsAuthenticated]
     queryset = PsychologicalInventoryQuestionaire.objects.all()
     serializer_class = PsychologicalInventoryQuestionaireSerializer
 
 
-class PsychologicalInventorySummaryViewSet(ModelViewSet):
+class PsychologicalInventorySummaryViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = PsychologicalInventorySummarySerializer
 
@@ -145,7 +150,7 @@ class PsychologicalInventorySummaryViewSet(ModelViewSet):
             )
 
 
-class PsychologicalInventoryAnswerViewSet(ModelViewSet):
+class PsychologicalInventoryAnswerViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = PsychologicalInventoryAnswerSerializer
 
@@ -161,7 +166,7 @@ class PsychologicalInventoryAnswerViewSet(ModelViewSet):
             )
 
 
-class BorghSummaryViewSet(ModelViewSet):
+class BorghSummaryViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = BorghSummarySerializer
 
@@ -175,7 +180,7 @@ class BorghSummaryViewSet(ModelViewSet):
             return BorghSummary.objects.filter(user=self.request.user.pk)
 
 
-class HamiltonSummaryViewSet(ModelViewSet):
+class HamiltonSummaryViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = HamiltonSummarySerializer
 
@@ -189,7 +194,7 @@ class HamiltonSummaryViewSet(ModelViewSet):
             return HamiltonSummary.objects.filter(user=self.request.user.pk)
 
 
-class HamiltonQuestionAnswerViewSet(ModelViewSet):
+class HamiltonQuestionAnswerViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = HamiltonQuestionAnswerSerializer
 
@@ -205,7 +210,7 @@ class HamiltonQuestionAnswerViewSet(ModelViewSet):
             )
 
 
-class MoodProfileSummaryViewSet(ModelViewSet):
+class MoodProfileSummaryViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = MoodProfileSummarySerializer
 
@@ -219,7 +224,7 @@ class MoodProfileSummaryViewSet(ModelViewSet):
             return MoodProfileSummary.objects.filter(user=self.request.user.pk)
 
 
-class MoodProfileAnswerViewSet(ModelViewSet):
+class MoodProfileAnswerViewSet(DeltaSyncMixin, ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
     serializer_class = MoodProfileAnswerSerializer
 
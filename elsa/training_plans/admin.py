@@ -10,5 +10,6 @@ admin.site.register(
         models.CyclingPlan,
         models.PhysicPlan,
         models.PhysicExerciseDescription,
+        models.CompletePlanTemplate,
     ]
 )
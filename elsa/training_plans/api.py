@@ -1,17 +1,33 @@
 import logging
 
+from itertools import chain
+
 from django.contrib.auth import get_user_model
-from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models.fields.json import KeyTransform
+
+from rest_framework.utils.encoders import JSONEncoder
 
-from elsa.nutrition.api import get_total_energy_expenditure
+from elsa.commons.profiling import profile_span, record_cache_lookup
+from elsa.memberships.models import Membership
+from elsa.nutrition.api import (
+    get_resting_energy_expenditure,
+    get_sports_activity_requirements,
+)
 
-from .models import CyclingPlan, PhysicPlan, QuestionsToPlan
+from .catalog import get_catalog_key, get_plans_catalog, get_plans_querysets
+from .models import (
+    CompletePlanTemplate,
+    CyclingPlan,
+    PhysicPlan,
+    QuestionsToPlan,
+    get_profile_key,
+)
 from .serializers import CyclingPlanSerializer, PhysicPlanSerializer
 
 User = get_user_model()
 
 
-def build_complete_plan(user, base_plan, membership_length):
+def build_complete_plan(base_plan, membership_length):
     complete_plan = {}
     calendar_length = 0
     while calendar_length < membership_length * 4:
@@ -22,14 +38,6 @@ def build_complete_plan(user, base_plan, membership_length):
             break
 
         for entry in base_plan:
-            tee, weight_goal_conclusion = get_total_energy_expenditure(
-                user, entry["day"], entry["week"]
-            )
-            entry["total_energy_expenditure"] = (
-                tee,
-                weight_goal_conclusion.value,
-            )
-
             new_key = entry["week"] + calendar_length
             if new_key not in complete_plan.keys():
                 complete_plan[new_key] = [entry]
@@ -41,29 +49,236 @@ def build_complete_plan(user, base_plan, membership_length):
     return complete_plan
 
 
+def to_calendar_list(complete_plan):
+    """Store a calendar as a list indexed by week - 1, so single weeks
+    can be read straight from the database, missing weeks are null."""
+    calendar = [None] * max(complete_plan.keys(), default=0)
+    for week, entries in complete_plan.items():
+        calendar[week - 1] = entries
+
+    return calendar
+
+
+def get_plan_fields(model):
+    """The plan columns stored in the calendars, the denormalized profile
+    keys only serve the lookups and are left out."""
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.name != "profile_keys"
+    ]
+
+
+@profile_span("complete_plan")
+def build_complete_plan_template(variables, membership_length):
+    """Precompute and store the training calendar shared by every
+    user matching the given plans profile and membership tier."""
+    cycling_training_base = (
+        CyclingPlan.objects.filter(
+            profile_keys__contains=[variables.profile_key]
+        )
+        .order_by("week", "day")
+        .values(*get_plan_fields(CyclingPlan))
+    )
+    physic_training_base = (
+        PhysicPlan.objects.filter(
+            profile_keys__contains=[variables.profile_key]
+        )
+        .order_by("week", "day")
+        .values(*get_plan_fields(PhysicPlan))
+    )
+
+    # Group all this data by week.
+    cycling_weeks = build_complete_plan(
+        cycling_training_base, membership_length
+    )
+    physic_weeks = build_complete_plan(physic_training_base, membership_length)
+
+    days = {
+        (entry["day"], entry["week"])
+        for entry in chain(cycling_training_base, physic_training_base)
+    }
+    sports_requirements = {
+        f"{week}-{day}": requirement
+        for (day, week), requirement in get_sports_activity_requirements(
+            variables, days
+        ).items()
+    }
+
+    template, _ = CompletePlanTemplate.objects.update_or_create(
+        variables=variables,
+        tier=membership_length,
+        defaults={
+            "cycling": to_calendar_list(cycling_weeks),
+            "physic": to_calendar_list(physic_weeks),
+            "sports_requirements": sports_requirements,
+        },
+    )
+
+    return template
+
+
+def build_complete_plan_templates():
+    """Precompute the training calendars for every
+    plans profile and membership tier."""
+    for variables in QuestionsToPlan.objects.all():
+        for tier in Membership.MembershipTiers:
+            build_complete_plan_template(variables, tier.value)
+
+
+def get_complete_plan_template(user, membership_length, weeks=None):
+    """Return the user's precomputed calendar template with its calendars
+    keyed by week. When `weeks` is given, only those weeks are read."""
+    templates_qs = CompletePlanTemplate.objects.filter(
+        variables__gender=user.gender,
+        variables__sports_goal=user.sports_goal,
+        variables__sports_level=user.sports_level,
+        tier=membership_length,
+    )
+    if weeks is not None:
+        templates_qs = templates_qs.defer("cycling", "physic").annotate(
+            **{
+                f"{section}_week_{week}": KeyTransform(str(week - 1), section)
+                for section in ["cycling", "physic"]
+                for week in weeks
+            }
+        )
+
+    template = templates_qs.first()
+    record_cache_lookup(template is not None)
+
+    if template is None:
+        variables = QuestionsToPlan.objects.filter(
+            gender=user.gender,
+            sports_goal=user.sports_goal,
+            sports_level=user.sports_level,
+        ).first()
+        if variables is None:
+            logging.warning(
+                "No plans profile found, please seed the database."
+            )
+            return None
+
+        template = build_complete_plan_template(variables, membership_length)
+        if weeks is not None:
+            for section in ["cycling", "physic"]:
+                calendar = getattr(template, section)
+                for week in weeks:
+                    entries = None
+                    if week <= len(calendar):
+                        entries = calendar[week - 1]
+                    setattr(template, f"{section}_week_{week}", entries)
+
+    for section in ["cycling", "physic"]:
+        if weeks is None:
+            calendar = enumerate(getattr(template, section), start=1)
+        else:
+            calendar = (
+                (week, getattr(template, f"{section}_week_{week}"))
+                for week in weeks
+            )
+
+        setattr(
+            template,
+            section,
+            {
+                str(week): entries
+                for week, entries in calendar
+                if entries is not None
+            },
+        )
+
+    return template
+
+
+def iter_energy_expenditure(user, calendar, sports_requirements):
+    """Yield the weeks of a precomputed calendar one at a time, with the
+    user's total energy expenditure overlaid on their entries."""
+    (
+        resting_energy_expenditure,
+        weight_goal_conclusion,
+    ) = get_resting_energy_expenditure(user)
+
+    for week, entries in calendar.items():
+        week_entries = []
+        for entry in entries:
+            tee = (
+                resting_energy_expenditure
+                + sports_requirements[f"{entry['week']}-{entry['day']}"]
+            )
+            week_entries.append(
+                {
+                    **entry,
+                    "total_energy_expenditure": (
+                        tee,
+                        weight_goal_conclusion.value,
+                    ),
+                }
+            )
+
+        yield week, week_entries
+
+
+def apply_energy_expenditure(user, calendar, sports_requirements):
+    """Overlay the user's total energy expenditure
+    on a precomputed calendar's entries."""
+    return dict(iter_energy_expenditure(user, calendar, sports_requirements))
+
+
+def stream_complete_plan(user, template):
+    """Yield the complete plan JSON document week by week, so neither the
+    overlaid calendar nor its rendered body are held entirely in memory."""
+    encoder = JSONEncoder(
+        ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    )
+
+    yield "{"
+    for index, section in enumerate(["cycling", "physic"]):
+        if index > 0:
+            yield ","
+        yield f"{encoder.encode(section)}:{{"
+
+        if template is not None:
+            weeks = iter_energy_expenditure(
+                user,
+                getattr(template, section),
+                template.sports_requirements,
+            )
+            for week_index, (week, entries) in enumerate(weeks):
+                if week_index > 0:
+                    yield ","
+                yield f"{encoder.encode(str(week))}:{encoder.encode(entries)}"
+
+        yield "}"
+    yield "}"
+
+
+def get_training_loads(profile, days):
+    """Return the cycling and physic plans of several (day, week) pairs
+    at once, grouped per pair like `get_daily_plans` returns them."""
+    catalog = get_plans_catalog()
+
+    return {
+        (day, week): catalog.get(get_catalog_key(profile, week, day), ([], []))
+        for day, week in days
+    }
+
+
 def get_daily_plans(user: User, relative_day, relative_week):
-    cycling_plans_ids = QuestionsToPlan.objects.filter(
-        gender=user.gender,
-        sports_goal=user.sports_goal,
-        sports_level=user.sports_level,
-        cyclingplan__day=relative_day,
-        cyclingplan__week=relative_week,
-    ).aggregate(cycling_plans_ids=ArrayAgg("cyclingplan", distinct=True))
-
-    physic_plans_ids = QuestionsToPlan.objects.filter(
-        gender=user.gender,
-        sports_goal=user.sports_goal,
-        sports_level=user.sports_level,
-        physicplan__day=relative_day,
-        physicplan__week=relative_week,
-    ).aggregate(physic_plans_ids=ArrayAgg("physicplan", distinct=True))
-
-    cycling_plans_qs = CyclingPlan.objects.filter(
-        pk__in=cycling_plans_ids["cycling_plans_ids"]
+    cycling_plans, physic_plans = get_plans_catalog().get(
+        get_catalog_key(user, relative_week, relative_day), ([], [])
     )
 
-    physic_plans_qs = PhysicPlan.objects.filter(
-        pk__in=physic_plans_ids["physic_plans_ids"]
+    return list(cycling_plans), list(physic_plans)
+
+
+def fetch_daily_plans(profile, relative_day, relative_week):
+    """Query the day's plans straight from the database, bypassing the
+    plans catalog, in a constant number of queries."""
+    cycling_plans_qs, physic_plans_qs = get_plans_querysets(
+        profile_keys__contains=[get_profile_key(profile)],
+        week=relative_week,
+        day=relative_day,
     )
 
     c_serializer = CyclingPlanSerializer(cycling_plans_qs, many=True)
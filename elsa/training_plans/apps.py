@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrainingPlansConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "elsa.training_plans"
+
+    def ready(self):
+        from . import signals  # noqa: F401
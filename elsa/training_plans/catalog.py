@@ -0,0 +1,56 @@
+from elsa.commons.catalogs import ProcessCatalog
+
+from .models import CyclingPlan, PhysicPlan, get_profile_key
+from .serializers import CyclingPlanSerializer, PhysicPlanSerializer
+
+
+def get_catalog_key(profile, week, day):
+    return (get_profile_key(profile), week, day)
+
+
+def get_plans_querysets(**filters):
+    """Return the cycling and physic plans querysets with every relation
+    their serializers render, so serializing them costs a constant number
+    of queries: 2 for the cycling plans and 3 for the physic plans."""
+    cycling_plans_qs = (
+        CyclingPlan.objects.filter(**filters)
+        .select_related("training_plan")
+        .prefetch_related("variables")
+    )
+    physic_plans_qs = (
+        PhysicPlan.objects.filter(**filters)
+        .select_related("training_plan")
+        .prefetch_related("variables", "exercise_descriptions")
+    )
+
+    return cycling_plans_qs, physic_plans_qs
+
+
+def load_plans_catalog():
+    """Serialize every cycling and physic plan once, indexed by
+    (profile_key, week, day)."""
+    cycling_plans_qs, physic_plans_qs = get_plans_querysets()
+
+    c_serializer = CyclingPlanSerializer(cycling_plans_qs, many=True)
+    p_serializer = PhysicPlanSerializer(physic_plans_qs, many=True)
+
+    catalog = {}
+    for index, (plans_qs, plans) in enumerate(
+        [
+            (cycling_plans_qs, c_serializer.data),
+            (physic_plans_qs, p_serializer.data),
+        ]
+    ):
+        for plan, data in zip(plans_qs, plans):
+            for profile_key in plan.profile_keys:
+                key = (profile_key, plan.week, plan.day)
+                catalog.setdefault(key, ([], []))[index].append(data)
+
+    return catalog
+
+
+plans_catalog = ProcessCatalog("training_plans", load_plans_catalog)
+
+
+def get_plans_catalog():
+    return plans_catalog.get()
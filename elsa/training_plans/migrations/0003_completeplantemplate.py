@@ -0,0 +1,32 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import rest_framework.utils.encoders
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training_plans', '0002_alter_cyclingplan_cycling_training_intensity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompletePlanTemplate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tier', models.IntegerField(choices=[(3, 'Trimester'), (6, 'Semester'), (12, 'Year')], default=3)),
+                ('cycling', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('physic', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('sports_requirements', models.JSONField(help_text="Sports activity requirement per 'week-day' key")),
+                ('variables', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='complete_plan_templates', to='training_plans.questionstoplan')),
+            ],
+            options={
+                'unique_together': {('variables', 'tier')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:20
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def fill_profile_keys(apps, schema_editor):
+    for model_name in ["CyclingPlan", "PhysicPlan"]:
+        model = apps.get_model("training_plans", model_name)
+        for plan in model.objects.prefetch_related("variables"):
+            plan.profile_keys = sorted(
+                {
+                    f"{v.gender}-{v.sports_level}-{v.sports_goal}"
+                    for v in plan.variables.all()
+                }
+            )
+            plan.save(update_fields=["profile_keys"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training_plans', '0003_completeplantemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cyclingplan',
+            name='profile_keys',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=8), blank=True, default=list, editable=False, help_text="Denormalized profile keys of the plan's variables", size=None),
+        ),
+        migrations.AddField(
+            model_name='physicplan',
+            name='profile_keys',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=8), blank=True, default=list, editable=False, help_text="Denormalized profile keys of the plan's variables", size=None),
+        ),
+        migrations.RunPython(fill_profile_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cyclingplan',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['profile_keys'], name='training_pl_profile_f2b811_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='physicplan',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['profile_keys'], name='training_pl_profile_9daa01_gin'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.5 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training_plans', '0005_plan_profile_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cyclingplan',
+            index=models.Index(fields=['week', 'day'], name='training_pl_week_0336b5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='physicplan',
+            index=models.Index(fields=['week', 'day'], name='training_pl_week_9b54ed_idx'),
+        ),
+    ]
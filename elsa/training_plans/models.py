@@ -1,7 +1,11 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from rest_framework.utils.encoders import JSONEncoder
+
 from elsa.commons.models import (
     UUIDPrimaryKeyModel,
     TimeStampedModel,
@@ -13,6 +17,7 @@ from elsa.commons.enums import (
     WeekDays,
 )
 
+from elsa.memberships.models import Membership
 from elsa.users.models import CustomUser
 
 
@@ -45,6 +50,16 @@ class QuestionsToPlan(UUIDPrimaryKeyModel, TimeStampedModel):
     class Meta:
         unique_together = ["gender", "sports_level", "sports_goal"]
 
+    @property
+    def profile_key(self):
+        return get_profile_key(self)
+
+
+def get_profile_key(profile):
+    """Denormalized key of a plans profile, `profile`
+    can be either a QuestionsToPlan or an user."""
+    return f"{profile.gender}-{profile.sports_level}-{profile.sports_goal}"
+
 
 class CyclingPlan(UUIDPrimaryKeyModel, TimeStampedModel):
     class TrainingIntensities(models.IntegerChoices):
@@ -90,6 +105,19 @@ class CyclingPlan(UUIDPrimaryKeyModel, TimeStampedModel):
     return_calm = models.FloatField()
     warming = models.CharField(max_length=20, null=True, blank=True)
     variables = models.ManyToManyField(to=QuestionsToPlan)
+    profile_keys = ArrayField(
+        models.CharField(max_length=8),
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Denormalized profile keys of the plan's variables",
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["profile_keys"]),
+            models.Index(fields=["week", "day"]),
+        ]
 
 
 class PhysicExerciseDescription(UUIDPrimaryKeyModel, TimeStampedModel):
@@ -132,3 +160,39 @@ class PhysicPlan(UUIDPrimaryKeyModel, TimeStampedModel):
         to=PhysicExerciseDescription
     )
     variables = models.ManyToManyField(to=QuestionsToPlan)
+    profile_keys = ArrayField(
+        models.CharField(max_length=8),
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Denormalized profile keys of the plan's variables",
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["profile_keys"]),
+            models.Index(fields=["week", "day"]),
+        ]
+
+
+class CompletePlanTemplate(UUIDPrimaryKeyModel, TimeStampedModel):
+    """A precomputed training calendar for a plans profile and
+    membership tier, the user's energy expenditure is overlaid on read."""
+
+    variables = models.ForeignKey(
+        to=QuestionsToPlan,
+        related_name="complete_plan_templates",
+        on_delete=models.CASCADE,
+    )
+    tier = models.IntegerField(
+        choices=Membership.MembershipTiers.choices,
+        default=Membership.MembershipTiers.TRIMESTER,
+    )
+    cycling = models.JSONField(encoder=JSONEncoder)
+    physic = models.JSONField(encoder=JSONEncoder)
+    sports_requirements = models.JSONField(
+        help_text="Sports activity requirement per 'week-day' key"
+    )
+
+    class Meta:
+        unique_together = ["variables", "tier"]
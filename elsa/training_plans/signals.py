@@ -0,0 +1,108 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from .catalog import plans_catalog
+from .models import (
+    CompletePlanTemplate,
+    CyclingPlan,
+    PhysicExerciseDescription,
+    PhysicPlan,
+    QuestionsToPlan,
+    TrainingPlan,
+)
+
+
+def sync_profile_keys(plans_qs):
+    """Recompute the denormalized profile keys of the given plans
+    from their variables."""
+    for plan in plans_qs.prefetch_related("variables"):
+        profile_keys = sorted(
+            {variables.profile_key for variables in plan.variables.all()}
+        )
+        if plan.profile_keys != profile_keys:
+            # Use update() so the plan's own signals are not triggered.
+            plans_qs.model.objects.filter(pk=plan.pk).update(
+                profile_keys=profile_keys
+            )
+
+
+@receiver(m2m_changed, sender=CyclingPlan.variables.through)
+@receiver(m2m_changed, sender=PhysicPlan.variables.through)
+def sync_plans_variables(
+    sender, instance, action, reverse, model, pk_set, **kwargs
+):
+    if not reverse:
+        if action in ["post_add", "post_remove", "post_clear"]:
+            sync_profile_keys(type(instance).objects.filter(pk=instance.pk))
+        return
+
+    # 'instance' is the QuestionsToPlan and 'model' the plan model, on
+    # clear 'pk_set' is None so the linked plans are kept beforehand.
+    if action == "pre_clear":
+        instance._cleared_plans_pks = list(
+            sender.objects.filter(questionstoplan=instance).values_list(
+                sender._meta.get_field(model._meta.model_name).attname,
+                flat=True,
+            )
+        )
+    elif action == "post_clear":
+        pk_set = getattr(instance, "_cleared_plans_pks", [])
+
+    if action in ["post_add", "post_remove", "post_clear"]:
+        sync_profile_keys(model.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=QuestionsToPlan)
+def sync_questions_to_plan(sender, instance, **kwargs):
+    sync_profile_keys(instance.cyclingplan_set.all())
+    sync_profile_keys(instance.physicplan_set.all())
+
+
+@receiver(pre_delete, sender=QuestionsToPlan)
+def stash_questions_to_plan_plans(sender, instance, **kwargs):
+    # The m2m rows are gone by post_delete, keep the affected plans.
+    instance._plans_pks = (
+        list(instance.cyclingplan_set.values_list("pk", flat=True)),
+        list(instance.physicplan_set.values_list("pk", flat=True)),
+    )
+
+
+@receiver(post_delete, sender=QuestionsToPlan)
+def sync_deleted_questions_to_plan(sender, instance, **kwargs):
+    cycling_plans_pks, physic_plans_pks = getattr(
+        instance, "_plans_pks", ([], [])
+    )
+    sync_profile_keys(CyclingPlan.objects.filter(pk__in=cycling_plans_pks))
+    sync_profile_keys(PhysicPlan.objects.filter(pk__in=physic_plans_pks))
+
+
+@receiver(post_save, sender=TrainingPlan)
+@receiver(post_save, sender=CyclingPlan)
+@receiver(post_save, sender=PhysicPlan)
+@receiver(post_save, sender=PhysicExerciseDescription)
+@receiver(post_save, sender=QuestionsToPlan)
+@receiver(post_delete, sender=TrainingPlan)
+@receiver(post_delete, sender=CyclingPlan)
+@receiver(post_delete, sender=PhysicPlan)
+@receiver(post_delete, sender=PhysicExerciseDescription)
+@receiver(post_delete, sender=QuestionsToPlan)
+@receiver(m2m_changed, sender=CyclingPlan.variables.through)
+@receiver(m2m_changed, sender=PhysicPlan.variables.through)
+@receiver(m2m_changed, sender=PhysicPlan.exercise_descriptions.through)
+def invalidate_plans_catalog(sender, **kwargs):
+    """Drop the plans catalog and the precomputed calendars whenever
+    the base plans change, they are rebuilt on the next request. Both
+    wait for the commit, or a request could rebuild them from the plans
+    as they were before the change."""
+    transaction.on_commit(purge_plans_catalog)
+
+
+def purge_plans_catalog():
+    plans_catalog.invalidate()
+    CompletePlanTemplate.objects.all().delete()
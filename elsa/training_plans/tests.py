@@ -1,3 +1,677 @@
-from django.test import TestCase
+import json
+import time
+from datetime import datetime, timezone
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from elsa.commons.enums import SportsGoals, SportsLevels
+from elsa.commons.profiling import profile_request, profile_span
+from elsa.commons.testing import QueryBudgetMixin
+from elsa.memberships.models import Membership
+from elsa.nutrition.api import (
+    get_resting_energy_expenditure,
+    get_sports_activity_requirement,
+)
+from elsa.users.models import CustomUser
+
+from .api import (
+    apply_energy_expenditure,
+    build_complete_plan_templates,
+    fetch_daily_plans,
+    get_complete_plan_template,
+    get_daily_plans,
+    get_training_loads,
+    stream_complete_plan,
+)
+from .catalog import load_plans_catalog, plans_catalog
+from .models import (
+    CompletePlanTemplate,
+    CyclingPlan,
+    PhysicExerciseDescription,
+    PhysicPlan,
+    QuestionsToPlan,
+    TrainingPlan,
+)
+
+
+def create_cycling_plan(training_plan, variables, day=1, week=1):
+    cycling_plan = CyclingPlan.objects.create(
+        training_plan=training_plan,
+        day=day,
+        week=week,
+        cycling_training_time=60,
+        series=1,
+        series_rest_time=0,
+        exercise_description="Tiempo sobre la bicicleta",
+        repetitions=1,
+        repetition_time=0,
+        repetition_rest_time=0,
+        return_calm=5,
+    )
+    cycling_plan.variables.add(variables)
+
+    return cycling_plan
+
+
+def create_physic_plan(training_plan, variables, day=1, week=1):
+    physic_plan = PhysicPlan.objects.create(
+        training_plan=training_plan,
+        day=day,
+        week=week,
+        gym_training_time=45,
+    )
+    physic_plan.variables.add(variables)
+    physic_plan.exercise_descriptions.add(
+        PhysicExerciseDescription.objects.create(
+            activities="Sentadillas", description="3 series de 12"
+        ),
+        PhysicExerciseDescription.objects.create(
+            activities="Plancha", description="3 series de 30 segundos"
+        ),
+    )
+
+    return physic_plan
+
+
+class DailyPlansQueriesTestCase(TestCase):
+    """Guard the number of queries needed to load the daily plans,
+    it must not grow with the number of plans or their relations."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.variables = QuestionsToPlan.objects.create(
+            gender=CustomUser.Genders.FEMALE,
+            sports_level=SportsLevels.INTERMEDIATE,
+            sports_goal=SportsGoals.PERFORMANCE,
+        )
+        cls.other_variables = QuestionsToPlan.objects.create(
+            gender=CustomUser.Genders.MALE,
+            sports_level=SportsLevels.INTERMEDIATE,
+            sports_goal=SportsGoals.PERFORMANCE,
+        )
+        cls.training_plan = TrainingPlan.objects.create(
+            tier=SportsLevels.INTERMEDIATE
+        )
+
+        for _ in range(3):
+            create_cycling_plan(cls.training_plan, cls.variables)
+            create_physic_plan(cls.training_plan, cls.variables)
+
+        create_cycling_plan(cls.training_plan, cls.variables, day=2)
+        create_physic_plan(cls.training_plan, cls.other_variables)
+
+    def test_fetch_daily_plans_queries(self):
+        with self.assertNumQueries(5):
+            cycling_plans, physic_plans = fetch_daily_plans(
+                self.variables, 1, 1
+            )
+
+        self.assertEqual(len(cycling_plans), 3)
+        self.assertEqual(len(physic_plans), 3)
+        self.assertEqual(len(physic_plans[0]["exercise_descriptions"]), 2)
+
+    def test_fetch_daily_plans_queries_do_not_grow(self):
+        for _ in range(5):
+            create_cycling_plan(self.training_plan, self.variables)
+            create_physic_plan(self.training_plan, self.variables)
+
+        with self.assertNumQueries(5):
+            cycling_plans, physic_plans = fetch_daily_plans(
+                self.variables, 1, 1
+            )
+
+        self.assertEqual(len(cycling_plans), 8)
+        self.assertEqual(len(physic_plans), 8)
+
+    def test_load_plans_catalog_queries(self):
+        with self.assertNumQueries(5):
+            catalog = load_plans_catalog()
+
+        cycling_plans, physic_plans = catalog[
+            (self.variables.profile_key, 1, 1)
+        ]
+        self.assertEqual(len(cycling_plans), 3)
+        self.assertEqual(len(physic_plans), 3)
+
+    def test_get_daily_plans_matches_fetch_daily_plans(self):
+        plans_catalog.invalidate()
+
+        with self.assertNumQueries(5):
+            cycling_plans, physic_plans = get_daily_plans(self.variables, 1, 1)
+
+        with self.assertNumQueries(0):
+            get_daily_plans(self.variables, 1, 1)
+
+        fetched_cycling_plans, fetched_physic_plans = fetch_daily_plans(
+            self.variables, 1, 1
+        )
+        self.assertCountEqual(cycling_plans, fetched_cycling_plans)
+        self.assertCountEqual(physic_plans, fetched_physic_plans)
+
+
+class PlansCatalogTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.variables = QuestionsToPlan.objects.create()
+        training_plan = TrainingPlan.objects.create()
+        create_cycling_plan(training_plan, cls.variables, day=1)
+        create_physic_plan(training_plan, cls.variables, day=1)
+        create_cycling_plan(training_plan, cls.variables, day=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_daily_plans_without_queries(self):
+        get_daily_plans(self.variables, 1, 1)
+
+        with self.assertNumQueries(0):
+            cycling_plans, physic_plans = get_daily_plans(self.variables, 1, 1)
+            training_loads = get_training_loads(
+                self.variables, [(1, 1), (2, 1), (3, 1)]
+            )
+
+        self.assertEqual(len(cycling_plans), 1)
+        self.assertEqual(len(physic_plans), 1)
+        self.assertEqual(
+            [
+                (len(cycling_plans), len(physic_plans))
+                for cycling_plans, physic_plans in training_loads.values()
+            ],
+            [(1, 1), (1, 0), (0, 0)],
+        )
+
+    def test_plan_save_invalidates_catalog(self):
+        get_daily_plans(self.variables, 1, 1)
+
+        cycling_plan = CyclingPlan.objects.get(day=1)
+        cycling_plan.cycling_training_time = 90
+        with self.captureOnCommitCallbacks(execute=True):
+            cycling_plan.save()
+
+        cycling_plans, _ = get_daily_plans(self.variables, 1, 1)
+        self.assertEqual(cycling_plans[0]["cycling_training_time"], 90)
+
+    def test_plan_delete_invalidates_catalog(self):
+        get_daily_plans(self.variables, 1, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PhysicPlan.objects.get().delete()
+
+        _, physic_plans = get_daily_plans(self.variables, 1, 1)
+        self.assertEqual(physic_plans, [])
+        with self.assertNumQueries(0):
+            get_daily_plans(self.variables, 1, 1)
+
+    def test_catalog_reloaded_after_commit(self):
+        get_daily_plans(self.variables, 1, 1)
+        get_complete_plan_template(self.variables, 3)
+
+        cycling_plan = CyclingPlan.objects.get(day=1)
+        cycling_plan.cycling_training_time = 90
+        with self.captureOnCommitCallbacks() as callbacks:
+            cycling_plan.save()
+
+            # Until the commit, the catalog and the templates are kept.
+            with self.assertNumQueries(0):
+                cycling_plans, _ = get_daily_plans(self.variables, 1, 1)
+            self.assertEqual(cycling_plans[0]["cycling_training_time"], 60)
+            self.assertTrue(CompletePlanTemplate.objects.exists())
+
+        for callback in callbacks:
+            callback()
+
+        cycling_plans, _ = get_daily_plans(self.variables, 1, 1)
+        self.assertEqual(cycling_plans[0]["cycling_training_time"], 90)
+        self.assertFalse(CompletePlanTemplate.objects.exists())
+
+
+class PlanProfileKeysTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.variables = QuestionsToPlan.objects.create(
+            gender=CustomUser.Genders.FEMALE,
+            sports_level=SportsLevels.BEGINNER,
+            sports_goal=SportsGoals.HEALTH_SOCIAL,
+        )
+        cls.other_variables = QuestionsToPlan.objects.create(
+            gender=CustomUser.Genders.MALE,
+            sports_level=SportsLevels.BEGINNER,
+            sports_goal=SportsGoals.HEALTH_SOCIAL,
+        )
+        cls.cycling_plan = create_cycling_plan(
+            TrainingPlan.objects.create(), cls.variables
+        )
+
+    def test_profile_keys_follow_plan_variables(self):
+        self.cycling_plan.refresh_from_db()
+        self.assertEqual(
+            self.cycling_plan.profile_keys, [self.variables.profile_key]
+        )
+
+        self.cycling_plan.variables.add(self.other_variables)
+        self.cycling_plan.refresh_from_db()
+        self.assertEqual(
+            self.cycling_plan.profile_keys,
+            sorted(
+                [
+                    self.variables.profile_key,
+                    self.other_variables.profile_key,
+                ]
+            ),
+        )
+
+        self.variables.cyclingplan_set.clear()
+        self.cycling_plan.refresh_from_db()
+        self.assertEqual(
+            self.cycling_plan.profile_keys,
+            [self.other_variables.profile_key],
+        )
+
+    def test_profile_keys_follow_questions_to_plan(self):
+        self.variables.sports_level = SportsLevels.ADVANCED
+        self.variables.save()
+        self.cycling_plan.refresh_from_db()
+        self.assertEqual(
+            self.cycling_plan.profile_keys, [self.variables.profile_key]
+        )
+
+        self.variables.delete()
+        self.cycling_plan.refresh_from_db()
+        self.assertEqual(self.cycling_plan.profile_keys, [])
+
+
+class CompletePlanStreamingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.variables = QuestionsToPlan.objects.create(
+            gender=CustomUser.Genders.MALE,
+            sports_level=SportsLevels.BEGINNER,
+            sports_goal=SportsGoals.HEALTH_SOCIAL,
+        )
+        training_plan = TrainingPlan.objects.create()
+        for week in range(1, 5):
+            for day in [1, 3, 5]:
+                create_cycling_plan(training_plan, cls.variables, day, week)
+            create_physic_plan(training_plan, cls.variables, 2, week)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+        )
+
+    def test_stream_complete_plan_matches_rendered_plan(self):
+        template = get_complete_plan_template(self.user, 3)
+
+        rendered_plan = JSONRenderer().render(
+            {
+                "cycling": apply_energy_expenditure(
+                    self.user, template.cycling, template.sports_requirements
+                ),
+                "physic": apply_energy_expenditure(
+                    self.user, template.physic, template.sports_requirements
+                ),
+            }
+        )
+        streamed_plan = "".join(stream_complete_plan(self.user, template))
+
+        self.assertEqual(streamed_plan.encode(), rendered_plan)
+        self.assertEqual(
+            list(template.cycling), [str(week) for week in range(1, 13)]
+        )
+        self.assertNotIn("profile_keys", template.cycling["1"][0])
+
+    def test_stream_complete_plan_without_template(self):
+        streamed_plan = "".join(stream_complete_plan(self.user, None))
+
+        self.assertEqual(streamed_plan, '{"cycling":{},"physic":{}}')
+
+    def test_complete_plan_template_window(self):
+        # The first call builds the template, the second one reads it back.
+        get_complete_plan_template(self.user, 3)
+        template = get_complete_plan_template(self.user, 3)
+
+        with self.assertNumQueries(1):
+            window = get_complete_plan_template(self.user, 3, range(5, 8))
+
+        self.assertEqual(list(window.cycling), ["5", "6", "7"])
+        self.assertEqual(list(window.physic), ["5", "6", "7"])
+        for week in ["5", "6", "7"]:
+            self.assertEqual(window.cycling[week], template.cycling[week])
+            self.assertEqual(window.physic[week], template.physic[week])
+
+    def test_complete_plan_template_window_out_of_range(self):
+        window = get_complete_plan_template(self.user, 3, range(12, 15))
+
+        self.assertEqual(list(window.cycling), ["12"])
+
+
+class CompleteTrainingPlanViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.variables = QuestionsToPlan.objects.create()
+        training_plan = TrainingPlan.objects.create()
+        for week in range(1, 5):
+            for day in [1, 3, 5]:
+                cycling_plan = create_cycling_plan(
+                    training_plan, cls.variables, day, week
+                )
+                CyclingPlan.objects.filter(pk=cycling_plan.pk).update(
+                    cycling_training_time=10 * week + day
+                )
+            create_physic_plan(training_plan, cls.variables, 2, week)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def build_complete_plan(self):
+        """The complete plan as the view used to build it on every request,
+        with a database lookup of the plans of every entry."""
+        (
+            resting_energy_expenditure,
+            weight_goal_conclusion,
+        ) = get_resting_energy_expenditure(self.user)
+
+        complete_plan = {}
+        for section, model in [
+            ("cycling", CyclingPlan),
+            ("physic", PhysicPlan),
+        ]:
+            # The denormalized profile keys are not part of a plan.
+            base_plan = model.objects.filter(variables=self.variables)
+            fields = [
+                field.attname
+                for field in model._meta.concrete_fields
+                if field.name != "profile_keys"
+            ]
+            base_plan = base_plan.order_by("week", "day").values(*fields)
+            calendar = {}
+            while len(calendar) < self.user.membership.tier * 4:
+                calendar_length = len(calendar)
+                for entry in base_plan:
+                    sports_requirement = get_sports_activity_requirement(
+                        *fetch_daily_plans(
+                            self.user, entry["day"], entry["week"]
+                        )
+                    )
+                    entry["total_energy_expenditure"] = (
+                        resting_energy_expenditure + sports_requirement,
+                        weight_goal_conclusion.value,
+                    )
+                    calendar.setdefault(
+                        entry["week"] + calendar_length, []
+                    ).append(entry)
+            complete_plan[section] = calendar
+
+        return json.loads(JSONRenderer().render(complete_plan))
+
+    def get_complete_plan(self, **params):
+        response = self.client.get(reverse("training_complete"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return json.loads(response.content)
+
+    def test_complete_plan_template_miss(self):
+        self.assertFalse(CompletePlanTemplate.objects.exists())
+
+        complete_plan = self.get_complete_plan()
+
+        self.assertEqual(complete_plan, self.build_complete_plan())
+        self.assertEqual(
+            list(complete_plan["cycling"]),
+            [str(week) for week in range(1, 13)],
+        )
+        self.assertTrue(
+            CompletePlanTemplate.objects.filter(
+                variables=self.variables, tier=self.user.membership.tier
+            ).exists()
+        )
+
+    def test_complete_plan_template_hit(self):
+        build_complete_plan_templates()
+
+        with self.assertNumQueries(1):
+            complete_plan = self.get_complete_plan()
+
+        self.assertEqual(complete_plan, self.build_complete_plan())
+
+    def test_complete_plan_template_rebuilt_after_plans_change(self):
+        self.get_complete_plan()
+
+        cycling_plan = CyclingPlan.objects.get(week=2, day=3)
+        cycling_plan.cycling_training_time = 90
+        with self.captureOnCommitCallbacks(execute=True):
+            cycling_plan.save()
+        self.assertFalse(CompletePlanTemplate.objects.exists())
+
+        complete_plan = self.get_complete_plan()
+
+        self.assertEqual(complete_plan, self.build_complete_plan())
+        for week in ["2", "6", "10"]:
+            self.assertEqual(
+                complete_plan["cycling"][week][1]["cycling_training_time"],
+                90,
+            )
+
+    def test_complete_plan_window(self):
+        complete_plan = self.get_complete_plan()
+
+        window = self.get_complete_plan(from_week=5, to_week=7)
+
+        for section in ["cycling", "physic"]:
+            self.assertEqual(list(window[section]), ["5", "6", "7"])
+            for week in ["5", "6", "7"]:
+                self.assertEqual(
+                    window[section][week], complete_plan[section][week]
+                )
+
+    def test_complete_plan_window_out_of_range(self):
+        window = self.get_complete_plan(from_week=-3, to_week=2)
+        self.assertEqual(list(window["cycling"]), ["1", "2"])
+
+        window = self.get_complete_plan(from_week=12, to_week=15)
+        self.assertEqual(list(window["cycling"]), ["12"])
+
+        window = self.get_complete_plan(from_week=13)
+        self.assertEqual(window, {"cycling": {}, "physic": {}})
+
+    def test_complete_plan_window_invalid(self):
+        for params in [{"from_week": "one"}, {"to_week": "2.5"}]:
+            response = self.client.get(reverse("training_complete"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_complete_plan_stream(self):
+        for params in [{}, {"from_week": 3, "to_week": 6}]:
+            response = self.client.get(
+                reverse("training_complete"), {"stream": 1, **params}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.streaming)
+
+            self.assertEqual(
+                json.loads(b"".join(response.streaming_content)),
+                self.get_complete_plan(**params),
+            )
+
+
+class DailyTrainingPlansETagTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        variables = QuestionsToPlan.objects.create()
+        create_cycling_plan(TrainingPlan.objects.create(), variables)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_daily_training_plans_not_modified(self):
+        response = self.client.get(reverse("training_daily"))
+        etag = response["ETag"]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["cycling"]), 1)
+
+        response = self.client.get(
+            reverse("training_daily"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_daily_training_plans_etag_changes_with_profile(self):
+        etag = self.client.get(reverse("training_daily"))["ETag"]
+
+        self.user.sports_level = SportsLevels.ADVANCED
+        self.user.save()
+
+        response = self.client.get(
+            reverse("training_daily"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["cycling"]), 0)
+
+
+class RequestProfilingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        variables = QuestionsToPlan.objects.create()
+        create_cycling_plan(TrainingPlan.objects.create(), variables)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_complete_plan_profile(self):
+        with self.assertLogs("elsa.profiling") as logs:
+            self.client.get(reverse("training_complete"))
+            response = self.client.get(reverse("training_complete"))
+
+        built, read = [json.loads(record.message) for record in logs.records]
+        self.assertEqual(built["view"], "training_complete")
+        self.assertEqual(built["status"], status.HTTP_200_OK)
+        self.assertIn("complete_plan", built["spans"])
+        self.assertGreater(built["cache_misses"], 0)
+
+        self.assertEqual(read["queries"], 1)
+        self.assertEqual(read["cache_misses"], 0)
+        self.assertEqual(read["spans"], {})
+
+        server_timing = response["Server-Timing"]
+        self.assertIn("sql;dur=", server_timing)
+        self.assertIn('desc="1 queries"', server_timing)
+        self.assertIn('cache;desc="1 hits, 0 misses"', server_timing)
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_daily_plans_profile(self):
+        with self.assertLogs("elsa.profiling") as logs:
+            self.client.get(reverse("training_daily"))
+            self.client.get(reverse("training_daily"))
+
+        built, read = [json.loads(record.message) for record in logs.records]
+        self.assertIn("daily_bundle", built["spans"])
+        self.assertGreater(built["serializer_ms"], 0)
+        self.assertEqual(read["queries"], 0)
+        self.assertEqual(read["cache_misses"], 0)
+
+    def test_nested_spans(self):
+        @profile_span("nested")
+        def nested(depth):
+            if depth:
+                time.sleep(0.01)
+                nested(depth - 1)
+
+        with profile_request() as profile:
+            nested(2)
+
+        # Every call keeps its own start, the outer calls are not cut short
+        # by the inner ones: 0.02 + 0.01 + 0 seconds.
+        self.assertGreaterEqual(profile.spans["nested"], 0.03)
+
+    def test_profiling_is_opt_in(self):
+        response = self.client.get(reverse("training_daily"))
+
+        self.assertNotIn("Server-Timing", response)
+
+
+class TrainingPlansQueryBudgetsTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        variables = QuestionsToPlan.objects.create()
+        training_plan = TrainingPlan.objects.create()
+        for week in range(1, 5):
+            for day in range(1, 8):
+                create_cycling_plan(training_plan, variables, day, week)
+                create_physic_plan(training_plan, variables, day, week)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_daily_training_plans_budget(self):
+        with self.assertQueryBudget("DailyTrainingPlansView", "get"):
+            response = self.client.get(reverse("training_daily"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_complete_training_plan_budget(self):
+        # The first request builds the calendar, the next ones read it.
+        for _ in range(2):
+            with self.assertQueryBudget("CompleteTrainingPlanView", "get"):
+                response = self.client.get(reverse("training_complete"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1,5 +1,9 @@
 import logging
 
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
 from knox.auth import TokenAuthentication
 
 from rest_framework import status
@@ -8,9 +12,14 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from elsa.commons.authentication import IsAdminOrHasMembership
+from elsa.commons.etags import daily_plan_etag
+from elsa.users.bundles import get_daily_bundle
 
-from .models import CyclingPlan, PhysicPlan
-from .api import build_complete_plan, get_daily_plans
+from .api import (
+    apply_energy_expenditure,
+    get_complete_plan_template,
+    stream_complete_plan,
+)
 
 
 # Create your views here.
@@ -22,28 +31,37 @@ class CompleteTrainingPlanView(APIView):
         logging.info("Get CompleteTrainingPlan endpoint triggered.")
         user = request.user
         membership_length = user.membership.tier
+        calendar_length = membership_length * 4
 
-        cycling_plans_qs = CyclingPlan.objects.filter(
-            variables__gender=user.gender,
-            variables__sports_goal=user.sports_goal,
-            variables__sports_level=user.sports_level,
-        ).order_by("week", "day")
-        physic_plans_qs = PhysicPlan.objects.filter(
-            variables__gender=user.gender,
-            variables__sports_goal=user.sports_goal,
-            variables__sports_level=user.sports_level,
-        ).order_by("week", "day")
-
-        cycling_training_base = cycling_plans_qs.values()
-        physic_training_base = physic_plans_qs.values()
-
-        # Group all this data by week.
-        cycling_weeks = build_complete_plan(
-            user, cycling_training_base, membership_length
-        )
-        physic_weeks = build_complete_plan(
-            user, physic_training_base, membership_length
-        )
+        try:
+            from_week = int(request.query_params.get("from_week", 1))
+            to_week = int(request.query_params.get("to_week", calendar_length))
+        except ValueError:
+            return Response(
+                {"message": "'from_week' and 'to_week' must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        weeks = None
+        if from_week > 1 or to_week < calendar_length:
+            weeks = range(max(from_week, 1), min(to_week, calendar_length) + 1)
+
+        template = get_complete_plan_template(user, membership_length, weeks)
+        if request.query_params.get("stream") in ["1", "true"]:
+            return StreamingHttpResponse(
+                stream_complete_plan(user, template),
+                content_type="application/json",
+            )
+
+        if template is None:
+            cycling_weeks, physic_weeks = {}, {}
+        else:
+            cycling_weeks = apply_energy_expenditure(
+                user, template.cycling, template.sports_requirements
+            )
+            physic_weeks = apply_energy_expenditure(
+                user, template.physic, template.sports_requirements
+            )
 
         return Response(
             data={"cycling": cycling_weeks, "physic": physic_weeks},
@@ -55,15 +73,9 @@ class DailyTrainingPlansView(APIView):
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
 
+    @method_decorator(condition(etag_func=daily_plan_etag("training_plans")))
     def get(self, request):
-        user = request.user
-        cycling_plans, physic_plans = get_daily_plans(
-            user,
-            user.current_training_day["relative"],
-            user.current_training_week["relative"],
-        )
-
         return Response(
-            data={"cycling": cycling_plans, "physic": physic_plans},
+            data=get_daily_bundle(request.user)["training"],
             status=status.HTTP_200_OK,
         )
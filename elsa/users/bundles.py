@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+from elsa.commons.etags import get_daily_plan_fingerprint
+from elsa.commons.profiling import profile_span, record_cache_lookup
+from elsa.nutrition.api import get_daily_nutritional_plan
+from elsa.psychology.api import get_daily_psychological_plan
+from elsa.training_plans.api import get_daily_plans
+
+# Catalogs the daily bundles are computed from.
+BUNDLE_CATALOGS = ["training_plans", "meal_summaries", "psychology"]
+
+# Bundles are precomputed the night before, keep them for two days.
+BUNDLE_TIMEOUT = 60 * 60 * 48
+
+
+def get_daily_bundle_key(user, moment):
+    """Return the cache key of the user's bundle at 'moment', alongside
+    the relative day and week it is computed for. The key changes with
+    the user's profile and the catalogs versions, so stale bundles are
+    never served."""
+    training_day = user.get_training_day(moment)
+    relative_day = training_day["relative"]
+    relative_week = user.get_training_week(moment)["relative"]
+    fingerprint = get_daily_plan_fingerprint(
+        user, BUNDLE_CATALOGS, relative_day, relative_week
+    )
+    key = f"daily_bundle:{user.pk}:{training_day['absolute']}:{fingerprint}"
+
+    return key, relative_day, relative_week
+
+
+@profile_span("daily_bundle")
+def build_daily_bundle(user, relative_day, relative_week, psychology=None):
+    """Compute the training, nutritional and psychological plans of a
+    day, the day's training plans are loaded once for all of them. The
+    psychological plan only depends on the day, it can be given."""
+    cycling_plans, physic_plans = get_daily_plans(
+        user, relative_day, relative_week
+    )
+    nutrition, nutrition_status = get_daily_nutritional_plan(
+        user,
+        relative_day,
+        relative_week,
+        daily_plans=(cycling_plans, physic_plans),
+    )
+
+    return {
+        "training": {"cycling": cycling_plans, "physic": physic_plans},
+        "nutrition": nutrition,
+        "nutrition_status": nutrition_status,
+        "psychology": (
+            get_daily_psychological_plan(relative_day, relative_week)
+            if psychology is None
+            else psychology
+        ),
+    }
+
+
+def get_daily_bundle(user, moment=None):
+    """Return the user's daily bundle from the cache, computing and
+    storing it on a miss."""
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+
+    key, relative_day, relative_week = get_daily_bundle_key(user, moment)
+    bundle = cache.get(key)
+    record_cache_lookup(bundle is not None)
+    if bundle is None:
+        bundle = build_daily_bundle(user, relative_day, relative_week)
+        cache.set(key, bundle, BUNDLE_TIMEOUT)
+
+    return bundle
+
+
+def store_next_daily_bundles(users, moment):
+    """Compute the bundles of the training day following 'moment' of
+    several users and store them in the cache at once. Every user's day
+    rolls over at their own time, the psychological plans are computed
+    once per relative day and week."""
+    bundles = {}
+    psychological_plans = {}
+    for user in users:
+        key, relative_day, relative_week = get_daily_bundle_key(
+            user, user.get_next_training_day_start(moment)
+        )
+        day = (relative_day, relative_week)
+        if day not in psychological_plans:
+            psychological_plans[day] = get_daily_psychological_plan(*day)
+
+        bundles[key] = build_daily_bundle(
+            user,
+            relative_day,
+            relative_week,
+            psychology=psychological_plans[day],
+        )
+
+    cache.set_many(bundles, BUNDLE_TIMEOUT)
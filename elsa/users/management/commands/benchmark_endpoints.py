@@ -0,0 +1,307 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from elsa.memberships.models import Membership
+from elsa.nutrition.models import Food, MealSummary
+from elsa.psychology.models import (
+    BorghEffortScale,
+    BorghSummary,
+    HamiltonQuestion,
+    HamiltonQuestionAnswer,
+    HamiltonSummary,
+    IrrationalBeliefAnswer,
+    IrrationalBeliefQuestionaire,
+    IrrationalBeliefSummary,
+    MoodProfileAnswer,
+    MoodProfileSummary,
+    PsychologicalInventoryAnswer,
+    PsychologicalInventoryQuestionaire,
+    PsychologicalInventorySummary,
+    PsychologicalPlanSummary,
+)
+from elsa.training_plans.models import QuestionsToPlan
+from elsa.users.models import CustomUser
+
+FIXTURES = [
+    "initial_data",
+    "coupons",
+    "cycling_trainings",
+    "physic_descriptions",
+    "physic_trainings",
+    "nutritional_minutes",
+    "psychological_questions",
+]
+
+# Benchmarked endpoints, by name, with their URL name.
+ENDPOINTS = {
+    "CompleteTrainingPlanView": "training_complete",
+    "DailyTrainingPlansView": "training_daily",
+    "DailyNutritionalPlanView": "nutrition_daily",
+    "DailyNutritionalBillCalculationsView": "nutrition_intake",
+    "DailyPsychologicalPlanView": "psychology_daily",
+    "TodayView": "today",
+    "PsychologicalSummaryViewSet": "psychology_plan_summaries-list",
+    "IrrationalBeliefsSummaryViewSet": "psychology_beliefs_summaries-list",
+    "PsychologicalInventorySummaryViewSet": (
+        "psychology_inventory_summaries-list"
+    ),
+    "BorghSummaryViewSet": "psychology_borgh_summaries-list",
+    "HamiltonSummaryViewSet": "psychology_hamilton_summaries-list",
+    "MoodProfileSummaryViewSet": "psychology_mood_summaries-list",
+}
+
+
+class Rollback(Exception):
+    """Raised to discard the loaded fixtures and the synthetic data."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the fixtures and synthetic members of every membership tier "
+        "inside a transaction, then measure the latency, SQL queries and "
+        "peak memory of the plan endpoints and the summary viewsets. "
+        "Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users-per-tier", type=int, default=12)
+        parser.add_argument("--summaries", type=int, default=3)
+        parser.add_argument("--iterations", type=int, default=100)
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=list(ENDPOINTS),
+            help="Only benchmark the given endpoints, can be repeated.",
+        )
+        parser.add_argument("--label", default="")
+        parser.add_argument("--output", help="Write the results as JSON.")
+        parser.add_argument(
+            "--compare", help="A previous JSON output to compare with."
+        )
+
+    def handle(self, *args, **options):
+        self.iterations = options["iterations"]
+        endpoints = options["endpoint"] or list(ENDPOINTS)
+
+        # Allow the test client's host and turn DEBUG off, so the queries
+        # log does not grow during the benchmark.
+        try:
+            with override_settings(
+                DEBUG=False, ALLOWED_HOSTS=["testserver"]
+            ), transaction.atomic():
+                call_command("loaddata", *FIXTURES, verbosity=0)
+                users = self.seed(
+                    options["users_per_tier"], options["summaries"]
+                )
+                results = {
+                    name: self.measure(name, users) for name in endpoints
+                }
+
+                raise Rollback
+        except Rollback:
+            pass
+
+        output = {
+            "label": options["label"],
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "users": len(users),
+            "iterations": self.iterations,
+            "endpoints": results,
+        }
+        self.report(output, options["compare"])
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(output, output_file, indent=2)
+
+    def seed(self, users_per_tier, summaries):
+        now = datetime.now(timezone.utc)
+        rng = random.Random(360)
+        profiles = list(QuestionsToPlan.objects.all())
+
+        users = []
+        for membership in Membership.objects.all():
+            for number in range(users_per_tier):
+                profile = profiles[number % len(profiles)]
+                training_days = rng.randrange(membership.tier * 28)
+                username = f"benchmark-{membership.tier}-{number}"
+                users.append(
+                    CustomUser.objects.create(
+                        email=f"{username}@elsa360.com",
+                        username=username,
+                        age=rng.randint(18, 60),
+                        gender=profile.gender,
+                        height=rng.randint(160, 190),
+                        weight=rng.randint(60, 80),
+                        weight_goal=rng.randint(60, 80),
+                        sports_level=profile.sports_level,
+                        sports_goal=profile.sports_goal,
+                        membership=membership,
+                        training_start=now - timedelta(days=training_days),
+                        training_end=now + timedelta(days=30),
+                    )
+                )
+
+        belief_questionaires = list(
+            IrrationalBeliefQuestionaire.objects.prefetch_related("questions")
+        )
+        inventory_questionaires = list(
+            PsychologicalInventoryQuestionaire.objects.prefetch_related(
+                "questions"
+            )
+        )
+        hamilton_questions = list(HamiltonQuestion.objects.all())
+        borgh_scales = list(BorghEffortScale.objects.all())
+        for user in users:
+            PsychologicalPlanSummary.objects.create(
+                user=user,
+                active=True,
+                start_date=user.training_start,
+                end_date=user.training_end,
+            )
+            for _ in range(summaries):
+                questionaire = rng.choice(belief_questionaires)
+                summary = IrrationalBeliefSummary.objects.create(
+                    user=user, questionaire=questionaire
+                )
+                IrrationalBeliefAnswer.objects.bulk_create(
+                    IrrationalBeliefAnswer(
+                        summary=summary,
+                        answer=rng.choice(
+                            IrrationalBeliefAnswer.Answers.values
+                        ),
+                        intensity=rng.randint(0, 6),
+                    )
+                    for _ in questionaire.questions.all()
+                )
+
+                questionaire = rng.choice(inventory_questionaires)
+                summary = PsychologicalInventorySummary.objects.create(
+                    user=user, questionaire=questionaire
+                )
+                PsychologicalInventoryAnswer.objects.bulk_create(
+                    PsychologicalInventoryAnswer(
+                        summary=summary,
+                        answer=rng.choice(
+                            PsychologicalInventoryAnswer.Answers.values
+                        ),
+                    )
+                    for _ in questionaire.questions.all()
+                )
+
+                summary = HamiltonSummary.objects.create(user=user)
+                HamiltonQuestionAnswer.objects.bulk_create(
+                    HamiltonQuestionAnswer(
+                        summary=summary,
+                        question=question,
+                        answer=rng.choice(
+                            HamiltonQuestionAnswer.HamiltonScale.values
+                        ),
+                    )
+                    for question in hamilton_questions
+                )
+
+                summary = MoodProfileSummary.objects.create(user=user)
+                MoodProfileAnswer.objects.bulk_create(
+                    MoodProfileAnswer(
+                        summary=summary,
+                        feeling=feeling,
+                        intensity=rng.choice(
+                            MoodProfileAnswer.IntensityAnswers.values
+                        ),
+                    )
+                    for feeling in MoodProfileAnswer.Feelings
+                )
+
+                BorghSummary.objects.create(
+                    user=user, answer=rng.choice(borgh_scales)
+                )
+
+        foods_pks = [
+            str(pk) for pk in Food.objects.values_list("pk", flat=True)
+        ]
+        self.bill_params = {
+            meal.name: ",".join(rng.sample(foods_pks, 5))
+            for meal in MealSummary.MealTimes
+        }
+
+        return users
+
+    def measure(self, name, users):
+        url = reverse(ENDPOINTS[name])
+        params = {}
+        if name == "DailyNutritionalBillCalculationsView":
+            params = self.bill_params
+
+        clients = []
+        for user in users:
+            client = APIClient()
+            client.force_authenticate(user)
+            clients.append(client)
+
+        # A first request per user fills the process catalogs, the
+        # calendar templates and the daily bundles, as in production.
+        statuses = {client.get(url, params).status_code for client in clients}
+
+        timings = []
+        for iteration in range(self.iterations):
+            client = clients[iteration % len(clients)]
+            start = time.perf_counter()
+            client.get(url, params)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        # Queries and memory are measured apart, tracing slows the
+        # requests down.
+        queries = []
+        peaks = []
+        tracemalloc.start()
+        for client in clients:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            with CaptureQueriesContext(connection) as context:
+                client.get(url, params)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+            queries.append(len(context))
+        tracemalloc.stop()
+
+        timings.sort()
+        return {
+            "statuses": sorted(statuses),
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+            "queries": max(queries),
+            "peak_memory_kb": round(max(peaks) / 1024, 1),
+        }
+
+    def report(self, output, compare):
+        previous = {}
+        if compare:
+            with open(compare) as compare_file:
+                previous = json.load(compare_file)["endpoints"]
+
+        for name, result in output["endpoints"].items():
+            line = (
+                f"{name}: p50 {result['p50_ms']} ms, "
+                f"p95 {result['p95_ms']} ms, "
+                f"{result['queries']} queries, "
+                f"{result['peak_memory_kb']} KiB"
+            )
+            if name in previous:
+                line += " (was {} ms, {} ms, {} queries, {} KiB)".format(
+                    previous[name]["p50_ms"],
+                    previous[name]["p95_ms"],
+                    previous[name]["queries"],
+                    previous[name]["peak_memory_kb"],
+                )
+            self.stdout.write(line)
@@ -0,0 +1,324 @@
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import product
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from elsa.commons.enums import SportsGoals, SportsLevels, WeekDays
+from elsa.memberships.models import Payment
+from elsa.psychology.models import (
+    IrrationalBeliefAnswer,
+    IrrationalBeliefQuestionaire,
+    IrrationalBeliefSummary,
+    PsychologicalInventoryAnswer,
+    PsychologicalInventoryQuestionaire,
+    PsychologicalInventorySummary,
+    PsychologicalQuestion,
+)
+from elsa.training_plans.models import CyclingPlan, PhysicPlan, TrainingPlan
+from elsa.users.models import CustomUser
+
+# Models whose Meta.indexes are dropped for the "before" measurements.
+INDEXED_MODELS = [
+    CyclingPlan,
+    PhysicPlan,
+    PsychologicalQuestion,
+    IrrationalBeliefQuestionaire,
+    PsychologicalInventoryQuestionaire,
+    Payment,
+    CustomUser,
+]
+
+PROFILE_KEYS = [
+    f"{gender}-{level}-{goal}"
+    for gender, level, goal in product(
+        CustomUser.Genders.values, SportsLevels.values, SportsGoals.values
+    )
+]
+
+BATCH_SIZE = 5000
+
+
+class Rollback(Exception):
+    """Raised to discard the seeded rows and the dropped indexes."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large synthetic dataset inside a transaction and compare "
+        "the EXPLAIN plans and latencies of the hot lookups with and "
+        "without the models' indexes. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20000)
+        parser.add_argument("--weeks", type=int, default=52)
+        parser.add_argument("--plans-per-day", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--output", help="Write the results as JSON.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The benchmark requires PostgreSQL.")
+
+        self.repeat = options["repeat"]
+        results = {}
+        try:
+            with transaction.atomic():
+                self.stdout.write("Seeding...")
+                lookups = self.seed(
+                    options["users"],
+                    options["weeks"],
+                    options["plans_per_day"],
+                )
+
+                self.set_indexes(enabled=False)
+                results["before"] = self.measure(lookups)
+                self.set_indexes(enabled=True)
+                results["after"] = self.measure(lookups)
+
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.report(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+
+    def seed(self, users_count, weeks, plans_per_day):
+        now = datetime.now(timezone.utc)
+        rng = random.Random(360)
+
+        training_plan = TrainingPlan.objects.create()
+        cycling_plans = []
+        physic_plans = []
+        for week, day, profile_key, _ in product(
+            range(1, 5), WeekDays.values, PROFILE_KEYS, range(plans_per_day)
+        ):
+            cycling_plans.append(
+                CyclingPlan(
+                    training_plan=training_plan,
+                    week=week,
+                    day=day,
+                    cycling_training_time=60,
+                    series=1,
+                    series_rest_time=0,
+                    exercise_description="Tiempo sobre la bicicleta",
+                    repetitions=1,
+                    repetition_time=0,
+                    repetition_rest_time=0,
+                    return_calm=5,
+                    profile_keys=[profile_key],
+                )
+            )
+            physic_plans.append(
+                PhysicPlan(
+                    training_plan=training_plan,
+                    week=week,
+                    day=day,
+                    gym_training_time=45,
+                    profile_keys=[profile_key],
+                )
+            )
+        CyclingPlan.objects.bulk_create(cycling_plans, BATCH_SIZE)
+        PhysicPlan.objects.bulk_create(physic_plans, BATCH_SIZE)
+
+        questions = []
+        belief_questionaires = []
+        inventory_questionaires = []
+        for week, day in product(range(1, weeks + 1), WeekDays.values):
+            questions += [
+                PsychologicalQuestion(week=week, day=day, description="")
+                for _ in range(10)
+            ]
+            belief_questionaires.append(
+                IrrationalBeliefQuestionaire(
+                    week=week,
+                    day=day,
+                    title="",
+                    description="",
+                    summary_description="",
+                )
+            )
+            inventory_questionaires.append(
+                PsychologicalInventoryQuestionaire(
+                    week=week,
+                    day=day,
+                    title="",
+                    description="",
+                    summary_description="",
+                )
+            )
+        PsychologicalQuestion.objects.bulk_create(questions, BATCH_SIZE)
+        IrrationalBeliefQuestionaire.objects.bulk_create(belief_questionaires)
+        PsychologicalInventoryQuestionaire.objects.bulk_create(
+            inventory_questionaires
+        )
+
+        users = []
+        for number in range(users_count):
+            # Most memberships are already over, a few are still running.
+            training_end = now + timedelta(days=rng.randint(-365, 30))
+            users.append(
+                CustomUser(
+                    email=f"benchmark-{number}@elsa360.com",
+                    username=f"benchmark-{number}",
+                    age=30,
+                    height=175,
+                    weight=75,
+                    weight_goal=70,
+                    training_start=training_end - timedelta(days=90),
+                    training_end=training_end,
+                )
+            )
+        CustomUser.objects.bulk_create(users, BATCH_SIZE)
+
+        payments = [
+            Payment(
+                user=user,
+                reference_code=uuid4().hex,
+                amount=100,
+            )
+            for user in users
+            for _ in range(3)
+        ]
+        Payment.objects.bulk_create(payments, BATCH_SIZE)
+
+        belief_summaries = [
+            IrrationalBeliefSummary(
+                user=user, questionaire=rng.choice(belief_questionaires)
+            )
+            for user in users
+        ]
+        inventory_summaries = [
+            PsychologicalInventorySummary(
+                user=user, questionaire=rng.choice(inventory_questionaires)
+            )
+            for user in users
+        ]
+        IrrationalBeliefSummary.objects.bulk_create(
+            belief_summaries, BATCH_SIZE
+        )
+        PsychologicalInventorySummary.objects.bulk_create(
+            inventory_summaries, BATCH_SIZE
+        )
+        IrrationalBeliefAnswer.objects.bulk_create(
+            [
+                IrrationalBeliefAnswer(
+                    summary=summary, answer="SA", intensity=3
+                )
+                for summary in belief_summaries
+                for _ in range(10)
+            ],
+            BATCH_SIZE,
+        )
+        PsychologicalInventoryAnswer.objects.bulk_create(
+            [
+                PsychologicalInventoryAnswer(summary=summary)
+                for summary in inventory_summaries
+                for _ in range(10)
+            ],
+            BATCH_SIZE,
+        )
+
+        with connection.cursor() as cursor:
+            # Run the deferred foreign key checks now, Postgres refuses to
+            # create indexes on tables with pending trigger events.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        self.analyze()
+
+        user = rng.choice(users)
+        week, day = rng.randint(1, weeks), rng.choice(WeekDays.values)
+        profile_key = rng.choice(PROFILE_KEYS)
+        return {
+            "cycling_plans": CyclingPlan.objects.filter(
+                profile_keys__contains=[profile_key], week=2, day=day
+            ),
+            "physic_plans": PhysicPlan.objects.filter(
+                profile_keys__contains=[profile_key], week=2, day=day
+            ),
+            "psychological_questions": PsychologicalQuestion.objects.filter(
+                week=week, day=day
+            ),
+            "irrational_belief_questionaire": (
+                IrrationalBeliefQuestionaire.objects.filter(day=day, week=week)
+            ),
+            "psychological_inventory_questionaire": (
+                PsychologicalInventoryQuestionaire.objects.filter(
+                    day=day, week=week
+                )
+            ),
+            "payment_reference_code": Payment.objects.filter(
+                reference_code=rng.choice(payments).reference_code
+            ),
+            "expired_users": CustomUser.objects.filter(training_end__gte=now),
+            "irrational_belief_answers": IrrationalBeliefAnswer.objects.filter(
+                summary__user=user.pk
+            ),
+            "psychological_inventory_answers": (
+                PsychologicalInventoryAnswer.objects.filter(
+                    summary__user=user.pk
+                )
+            ),
+        }
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS + [
+                IrrationalBeliefAnswer,
+                IrrationalBeliefSummary,
+                PsychologicalInventoryAnswer,
+                PsychologicalInventorySummary,
+            ]:
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(f"ANALYZE {table}")
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as schema_editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    if enabled:
+                        schema_editor.add_index(model, index)
+                    else:
+                        schema_editor.remove_index(model, index)
+        self.analyze()
+
+    def measure(self, lookups):
+        results = {}
+        for name, queryset in lookups.items():
+            # Time the SQL alone, building the model instances would hide
+            # the difference between the plans.
+            sql, params = queryset.query.sql_with_params()
+            timings = []
+            with connection.cursor() as cursor:
+                for _ in range(self.repeat):
+                    start = time.perf_counter()
+                    cursor.execute(sql, params)
+                    rows = len(cursor.fetchall())
+                    timings.append((time.perf_counter() - start) * 1000)
+
+            timings.sort()
+            results[name] = {
+                "rows": rows,
+                "p50_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+                "plan": queryset.explain(analyze=True).splitlines(),
+            }
+
+        return results
+
+    def report(self, results):
+        for name, before in results["before"].items():
+            after = results["after"][name]
+            self.stdout.write(
+                f"{name}: {before['p50_ms']} ms -> {after['p50_ms']} ms "
+                f"({before['rows']} rows)"
+            )
+            self.stdout.write(f"  before: {before['plan'][0].strip()}")
+            self.stdout.write(f"  after:  {after['plan'][0].strip()}")
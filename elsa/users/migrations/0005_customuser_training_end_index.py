@@ -0,0 +1,17 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_customuser_age_alter_customuser_height_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['training_end'], name='users_custo_trainin_984225_idx'),
+        ),
+    ]
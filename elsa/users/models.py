@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -85,9 +85,9 @@ class CustomUser(AbstractUser, UUIDPrimaryKeyModel, TimeStampedModel):
     def height_in_meters(self):
         return self.height / 100
 
-    @property
-    def current_training_day(self):
-        current_day = (datetime.now(timezone.utc) - self.training_start).days
+    def get_training_day(self, moment):
+        """Return the absolute and relative training day at 'moment'."""
+        current_day = (moment - self.training_start).days
 
         if current_day < 0:
             # If current date is behind the training
@@ -110,8 +110,19 @@ class CustomUser(AbstractUser, UUIDPrimaryKeyModel, TimeStampedModel):
         return None
 
     @property
-    def current_training_week(self):
-        current_day = self.current_training_day["absolute"]
+    def current_training_day(self):
+        return self.get_training_day(datetime.now(timezone.utc))
+
+    def get_next_training_day_start(self, moment):
+        """Return the moment the training day following the one at
+        'moment' starts, days roll over at the time of 'training_start'."""
+        current_day = self.get_training_day(moment)["absolute"]
+
+        return self.training_start + timedelta(days=current_day)
+
+    def get_training_week(self, moment):
+        """Return the absolute and relative training week at 'moment'."""
+        current_day = self.get_training_day(moment)["absolute"]
         if current_day % 7 == 0:
             current_week = current_day // 7
         else:
@@ -126,5 +137,27 @@ class CustomUser(AbstractUser, UUIDPrimaryKeyModel, TimeStampedModel):
             "relative": relative_week,
         }
 
+    @property
+    def current_training_week(self):
+        return self.get_training_week(datetime.now(timezone.utc))
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "is_email_verified"]
+
+    class Meta(AbstractUser.Meta):
+        indexes = [models.Index(fields=["training_end"])]
+
+
+class Tombstone(UUIDPrimaryKeyModel):
+    """Id of a deleted row, kept so the delta syncs can tell the devices
+    to drop it. The owner is set for the rows owned by a user."""
+
+    model = models.CharField(max_length=100)
+    object_id = models.UUIDField()
+    owner = models.ForeignKey(
+        to=CustomUser, on_delete=models.CASCADE, null=True, blank=True
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["model", "deleted_at"])]
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from django_q.models import Task
+
+from elsa.commons.metrics import observe_task
+
+
+@receiver(post_save, sender=Task)
+def record_task_duration(sender, instance, **kwargs):
+    """Feed the finished django-q tasks to the task duration metrics."""
+    observe_task(instance)
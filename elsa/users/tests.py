@@ -1,3 +1,619 @@
-from django.test import TestCase
+from base64 import b64encode
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from itertools import count
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from django_q.brokers import get_broker
+from django_q.models import Task
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from elsa.commons.enums import SportsLevels
+from elsa.commons.metrics import TaskQueueCollector
+from elsa.commons.sync import SYNC_OVERLAP
+from elsa.commons.testing import (
+    QUERY_BUDGETS,
+    UNREACHABLE_ROUTES,
+    URL_MODULES,
+    QueryBudgetMixin,
+    get_routes,
+)
+from elsa.memberships.models import Membership
+from elsa.nutrition.models import FoodGroup
+from elsa.nutrition.tests import create_food
+from elsa.psychology.api import get_daily_psychological_plan
+from elsa.psychology.models import (
+    HamiltonQuestion,
+    HamiltonQuestionAnswer,
+    HamiltonSummary,
+)
+from elsa.training_plans.models import QuestionsToPlan, TrainingPlan
+from elsa.training_plans.tests import create_cycling_plan, create_physic_plan
+
+from .bundles import get_daily_bundle
+from .models import CustomUser, Tombstone
+from .utils import (
+    generate_token,
+    precompute_daily_bundles,
+    precompute_daily_bundles_chunk,
+)
+
+
+class BenchmarkIndexesCommandTestCase(TestCase):
+    def test_benchmark_indexes_rolls_back(self):
+        stdout = StringIO()
+        call_command(
+            "benchmark_indexes",
+            users=5,
+            weeks=1,
+            plans_per_day=1,
+            repeat=1,
+            stdout=stdout,
+        )
+
+        self.assertIn("payment_reference_code", stdout.getvalue())
+        self.assertFalse(CustomUser.objects.exists())
+
+
+class BenchmarkEndpointsCommandTestCase(TestCase):
+    def test_benchmark_endpoints_rolls_back(self):
+        stdout = StringIO()
+        call_command(
+            "benchmark_endpoints",
+            users_per_tier=1,
+            summaries=1,
+            iterations=2,
+            endpoint=["TodayView", "MoodProfileSummaryViewSet"],
+            stdout=stdout,
+        )
+
+        self.assertIn("TodayView: p50", stdout.getvalue())
+        self.assertIn("MoodProfileSummaryViewSet: p50", stdout.getvalue())
+        self.assertFalse(CustomUser.objects.exists())
+        self.assertFalse(Membership.objects.exists())
+
+
+class TodayViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        variables = QuestionsToPlan.objects.create()
+        training_plan = TrainingPlan.objects.create()
+        create_cycling_plan(training_plan, variables)
+        create_physic_plan(training_plan, variables)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_today_matches_daily_views(self):
+        response = self.client.get(reverse("today"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["training"]["cycling"]), 1)
+        self.assertEqual(
+            response.data["training"],
+            self.client.get(reverse("training_daily")).data,
+        )
+        self.assertEqual(
+            response.data["nutrition"],
+            self.client.get(reverse("nutrition_daily")).data,
+        )
+        self.assertEqual(
+            response.data["psychology"],
+            self.client.get(reverse("psychology_daily")).data,
+        )
+
+    def test_today_not_modified(self):
+        etag = self.client.get(reverse("today"))["ETag"]
+
+        response = self.client.get(reverse("today"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class DailyBundlesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        variables = QuestionsToPlan.objects.create()
+        create_cycling_plan(TrainingPlan.objects.create(), variables, day=2)
+
+        membership = Membership.objects.create(price=100)
+        cls.users = [
+            CustomUser.objects.create(
+                email=f"athlete-{number}@elsa360.com",
+                username=f"athlete-{number}",
+                age=30,
+                height=175,
+                weight=75,
+                weight_goal=70,
+                membership=membership,
+                training_start=datetime.now(timezone.utc),
+            )
+            for number in range(3)
+        ]
+        CustomUser.objects.create(
+            email="guest@elsa360.com",
+            username="guest",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+        )
+
+    @patch("elsa.users.utils.DAILY_BUNDLES_CHUNK_SIZE", 2)
+    @patch("elsa.users.utils.async_task")
+    def test_precompute_daily_bundles_in_chunks(self, async_task):
+        precompute_daily_bundles()
+
+        chunks = [call.args[1] for call in async_task.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertCountEqual(
+            [pk for chunk in chunks for pk in chunk],
+            [user.pk for user in self.users],
+        )
+
+    def test_precomputed_daily_bundle_is_served(self):
+        now = datetime.now(timezone.utc)
+        user = CustomUser.objects.get(pk=self.users[0].pk)
+        precompute_daily_bundles_chunk([user.pk], now)
+
+        # The next day starts at the time of the training start, its
+        # bundle is served until the day after.
+        next_day_start = user.training_start + timedelta(days=1)
+        for moment in [next_day_start, next_day_start + timedelta(hours=23)]:
+            with self.assertNumQueries(0):
+                bundle = get_daily_bundle(user, moment)
+            self.assertEqual(len(bundle["training"]["cycling"]), 1)
+
+    def test_precomputed_daily_bundle_follows_training_start(self):
+        now = datetime.now(timezone.utc)
+        user = CustomUser.objects.get(pk=self.users[1].pk)
+        user.training_start = now - timedelta(days=1, hours=18)
+        user.save()
+
+        # Day 2 started 18 hours ago, the bundle is the one of day 3.
+        next_day_start = user.get_next_training_day_start(now)
+        self.assertEqual(next_day_start, now + timedelta(hours=6))
+        self.assertEqual(user.get_training_day(next_day_start)["absolute"], 3)
+
+        precompute_daily_bundles_chunk([user.pk], now)
+        with self.assertNumQueries(0):
+            bundle = get_daily_bundle(user, next_day_start)
+        self.assertEqual(bundle["training"]["cycling"], [])
+
+    @patch(
+        "elsa.users.bundles.get_daily_psychological_plan",
+        wraps=get_daily_psychological_plan,
+    )
+    def test_precompute_psychological_plan_once_per_day(
+        self, daily_psychological_plan
+    ):
+        precompute_daily_bundles_chunk(
+            [user.pk for user in self.users], datetime.now(timezone.utc)
+        )
+
+        daily_psychological_plan.assert_called_once_with(2, 1)
+
+    def test_daily_bundle_follows_profile(self):
+        user = self.users[1]
+        get_daily_bundle(user)
+
+        user.sports_level = SportsLevels.ADVANCED
+        user.save()
+
+        self.assertEqual(get_daily_bundle(user)["training"]["cycling"], [])
+
+
+@override_settings(METRICS_TOKEN="scraper-token")
+class MetricsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_cycling_plan(
+            TrainingPlan.objects.create(), QuestionsToPlan.objects.create()
+        )
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def scrape(self):
+        return self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scraper-token"
+        )
+
+    def get_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_metrics_require_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong-token"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(self.scrape().status_code, status.HTTP_200_OK)
+
+    def test_request_metrics_by_route(self):
+        requests = self.get_sample(
+            "elsa_request_duration_seconds_count", view="today", method="GET"
+        )
+        misses = self.get_sample(
+            "elsa_cache_lookups_total", view="today", result="miss"
+        )
+
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse("today"))
+        self.client.force_authenticate(None)
+
+        self.assertEqual(
+            self.get_sample(
+                "elsa_request_duration_seconds_count",
+                view="today",
+                method="GET",
+            ),
+            requests + 1,
+        )
+        self.assertGreater(
+            self.get_sample(
+                "elsa_cache_lookups_total", view="today", result="miss"
+            ),
+            misses,
+        )
+
+        response = self.scrape()
+        self.assertContains(
+            response,
+            'elsa_request_db_queries_count{view="today"}',
+        )
+        self.assertContains(
+            response,
+            'elsa_requests_total{method="GET",status="200",view="today"}',
+        )
+
+    def test_task_metrics(self):
+        func = "elsa.users.utils.precompute_daily_bundles"
+        tasks = self.get_sample(
+            "elsa_task_duration_seconds_count", func=func, result="success"
+        )
+        started = datetime.now(timezone.utc)
+        Task.objects.create(
+            id="3f1f4a8e7c0d4b5e9a6b2c1d0e9f8a7b",
+            name="daily-bundles",
+            func=func,
+            started=started,
+            stopped=started + timedelta(seconds=2),
+            success=True,
+        )
+        get_broker().enqueue("payload")
+
+        self.assertEqual(
+            self.get_sample(
+                "elsa_task_duration_seconds_count",
+                func=func,
+                result="success",
+            ),
+            tasks + 1,
+        )
+        self.assertEqual(
+            next(TaskQueueCollector().collect()).samples[0].value, 1
+        )
+        self.assertContains(self.scrape(), "elsa_task_queue_depth 1.0")
+
+
+class DeltaSyncTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+        )
+        cls.other_user = CustomUser.objects.create(
+            email="cyclist@elsa360.com",
+            username="cyclist",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            membership=Membership.objects.create(price=100),
+        )
+        cls.staff_user = CustomUser.objects.create(
+            email="staff@elsa360.com",
+            username="staff",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_staff=True,
+        )
+        cls.question = HamiltonQuestion.objects.create(
+            number=1, title="Humor ansioso", description=""
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, basename, since, **params):
+        response = self.client.get(
+            reverse(f"{basename}-list"),
+            {"updated_since": since.isoformat(), **params},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data
+
+    def create_hamilton_summary(self, user):
+        summary = HamiltonSummary.objects.create(user=user)
+        HamiltonQuestionAnswer.objects.create(
+            summary=summary, question=self.question
+        )
+
+        return summary
+
+    def test_catalog_delta(self):
+        self.client.force_authenticate(self.staff_user)
+        food_group = FoodGroup.objects.create()
+        rice, plantain = [
+            create_food(food_group, name)
+            for name in ["Arroz blanco", "Plátano verde"]
+        ]
+        since = datetime.now(timezone.utc)
+
+        plantain.calories = 120
+        plantain.save()
+        create_food(food_group, "Ñame")
+        rice_id = rice.pk
+        rice.delete()
+
+        with self.assertNumQueries(2):
+            data = self.sync("foods", since)
+        self.assertEqual(
+            [food["name"] for food in data["updated"]],
+            ["Plátano verde", "Ñame"],
+        )
+        self.assertEqual(data["deleted"], [rice_id])
+        self.assertIsNone(data["next"])
+
+        # The next sync overlaps the last one, the changes committed late
+        # are not missed.
+        self.assertLessEqual(
+            data["synced_at"], datetime.now(timezone.utc) - SYNC_OVERLAP
+        )
+        data = self.sync("foods", data["synced_at"])
+        self.assertEqual(len(data["updated"]), 2)
+        self.assertEqual(data["deleted"], [rice_id])
+
+        data = self.sync("foods", datetime.now(timezone.utc))
+        self.assertEqual(data["updated"], [])
+        self.assertEqual(data["deleted"], [])
+
+    def test_catalog_delta_pages(self):
+        self.client.force_authenticate(self.staff_user)
+        food_group = FoodGroup.objects.create()
+        since = datetime.now(timezone.utc)
+        carrot, *_ = [
+            create_food(food_group, name)
+            for name in ["Zanahoria", "Banano", "Arroz blanco"]
+        ]
+        carrot_id = carrot.pk
+        carrot.delete()
+
+        data = self.sync("foods", since, page_size=1)
+        self.assertEqual(data["updated"][0]["name"], "Banano")
+        self.assertIsNone(data["synced_at"])
+        self.assertEqual(data["deleted"], [])
+
+        response = self.client.get(data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data["updated"][0]["name"], "Arroz blanco")
+        self.assertIsNone(data["next"])
+        self.assertIsNotNone(data["synced_at"])
+        self.assertEqual(data["deleted"], [carrot_id])
+
+    def test_user_owned_delta(self):
+        summary = self.create_hamilton_summary(self.user)
+        answer_id = summary.answers.get().pk
+        other_summary_id = self.create_hamilton_summary(self.other_user).pk
+        since = datetime.now(timezone.utc)
+
+        HamiltonQuestionAnswer.objects.get(pk=answer_id).delete()
+        HamiltonSummary.objects.get(pk=other_summary_id).delete()
+
+        data = self.sync("psychology_hamilton_answers", since)
+        self.assertEqual(data["updated"], [])
+        self.assertEqual(data["deleted"], [answer_id])
+
+        # The summary deleted its answers, they are tombstoned with it.
+        self.assertEqual(
+            Tombstone.objects.filter(owner=self.other_user).count(), 2
+        )
+        data = self.sync("psychology_hamilton_summaries", since)
+        self.assertEqual(data["deleted"], [])
+
+        self.client.force_authenticate(self.staff_user)
+        data = self.sync("psychology_hamilton_summaries", since)
+        self.assertEqual(data["deleted"], [other_summary_id])
+
+    def test_invalid_updated_since(self):
+        for updated_since in ["yesterday", "2022-13-01T00:00:00"]:
+            response = self.client.get(
+                reverse("psychology_hamilton_summaries-list"),
+                {"updated_since": updated_since},
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class UsersQueryBudgetsTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        variables = QuestionsToPlan.objects.create()
+        training_plan = TrainingPlan.objects.create()
+        create_cycling_plan(training_plan, variables)
+        create_physic_plan(training_plan, variables)
+
+        cls.user = CustomUser.objects.create(
+            email="athlete@elsa360.com",
+            username="athlete",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_email_verified=True,
+            membership=Membership.objects.create(price=100),
+            training_start=datetime.now(timezone.utc),
+        )
+        cls.user.set_password("clave-360")
+        cls.user.save()
+
+        cls.staff_user = CustomUser.objects.create(
+            email="staff@elsa360.com",
+            username="staff",
+            age=30,
+            height=175,
+            weight=75,
+            weight_goal=70,
+            is_staff=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_user_data(self, username):
+        return {
+            "username": username,
+            "email": f"{username}@elsa360.com",
+            "age": 28,
+            "height": 165,
+            "weight": 60,
+            "weight_goal": 58,
+        }
+
+    def test_query_budgets_match_routes(self):
+        routes = set()
+        for urls_module in URL_MODULES:
+            routes.update(get_routes(urls_module))
+
+        self.assertLessEqual(UNREACHABLE_ROUTES, routes)
+        routes -= UNREACHABLE_ROUTES
+        self.assertEqual(sorted(routes - set(QUERY_BUDGETS)), [])
+        self.assertEqual(sorted(set(QUERY_BUDGETS) - routes), [])
+
+    def test_today_budget(self):
+        with self.assertQueryBudget("TodayView", "get"):
+            response = self.client.get(reverse("today"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_users_budgets(self):
+        self.client.force_authenticate(self.staff_user)
+        numbers = count()
+        self.assertViewSetBudgets(
+            "UserViewSet",
+            "users",
+            lambda: CustomUser.objects.create(
+                **self.get_user_data(f"athlete-{next(numbers)}")
+            ),
+            self.get_user_data("cyclist"),
+        )
+
+    def test_register_budgets(self):
+        self.client.force_authenticate(None)
+        data = {
+            "user": self.get_user_data("cyclist"),
+            "password": "clave-360",
+            "confirm_password": "clave-360",
+        }
+        with self.assertQueryBudget("UserViewSet", "register"):
+            response = self.client.post(
+                reverse("users-register"), data, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertQueryBudget("UserViewSet", "resend_confirmation"):
+            response = self.client.get(
+                reverse("users-resend-confirmation", args=[self.user.pk])
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_budget(self):
+        self.client.force_authenticate(None)
+        credentials = b64encode(b"athlete@elsa360.com:clave-360").decode()
+        with self.assertQueryBudget("LoginView", "post"):
+            response = self.client.post(
+                reverse("knox_login"),
+                HTTP_AUTHORIZATION=f"Basic {credentials}",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_verify_user_budget(self):
+        uidb64 = urlsafe_base64_encode(force_bytes(self.user.pk))
+        token = generate_token.make_token(self.user)
+        with self.assertQueryBudget("VerifyUserView", "get"):
+            response = self.client.get(
+                reverse("user_verify", args=[uidb64, token])
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_password_reset_budgets(self):
+        with self.assertQueryBudget("RequestPasswordResetView", "post"):
+            response = self.client.post(
+                reverse("pwd_reset_email"), {"email": self.user.email}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        uidb64 = urlsafe_base64_encode(force_bytes(self.user.pk))
+        token = PasswordResetTokenGenerator().make_token(self.user)
+        with self.assertQueryBudget("ConfirmPasswordResetView", "get"):
+            response = self.client.get(
+                reverse("pwd_reset_verify", args=[uidb64, token])
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = {
+            "password": "nueva-clave-360",
+            "confirm_password": "nueva-clave-360",
+            "uidb64": uidb64,
+            "token": token,
+        }
+        with self.assertQueryBudget("PerformPasswordResetView", "post"):
+            response = self.client.post(reverse("password_reset"), data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -31,6 +31,7 @@ urlpatterns = [
         views.PerformPasswordResetView.as_view(),
         name="password_reset",
     ),
+    path("today/", views.TodayView.as_view(), name="today"),
 ]
 
 urlpatterns += router.urls
@@ -11,8 +11,14 @@ from django.utils.encoding import force_bytes
 
 from django.utils.http import urlsafe_base64_encode
 
+from django_q.tasks import async_task
+
+from .bundles import store_next_daily_bundles
 from .models import CustomUser
 
+# Number of users whose daily bundles are computed by a single task.
+DAILY_BUNDLES_CHUNK_SIZE = 500
+
 
 class CustomTokenGenerator(PasswordResetTokenGenerator):
     def _make_hash_value(self, user, timestamp: int) -> str:
@@ -74,3 +80,37 @@ def expire_users_membership():
     expired_users.update(
         membership=None, training_start=None, training_end=None
     )
+
+
+def precompute_daily_bundles():
+    """Enqueue the computation of the next day's bundles of every active
+    member, one task per chunk of users so none of them runs for long."""
+    now = datetime.now(timezone.utc)
+    members_qs = CustomUser.objects.filter(
+        membership__isnull=False, training_start__isnull=False
+    ).order_by("pk")
+
+    last_pk = None
+    while True:
+        chunk_qs = members_qs
+        if last_pk is not None:
+            chunk_qs = chunk_qs.filter(pk__gt=last_pk)
+
+        users_pks = list(
+            chunk_qs.values_list("pk", flat=True)[:DAILY_BUNDLES_CHUNK_SIZE]
+        )
+        if not users_pks:
+            break
+
+        async_task(
+            "elsa.users.utils.precompute_daily_bundles_chunk",
+            users_pks,
+            now,
+        )
+        last_pk = users_pks[-1]
+
+
+def precompute_daily_bundles_chunk(users_pks, moment):
+    store_next_daily_bundles(
+        CustomUser.objects.filter(pk__in=users_pks), moment
+    )
@@ -2,16 +2,23 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.shortcuts import get_object_or_404
 from django.utils.encoding import force_str
+from django.utils.decorators import method_decorator
 from django.utils.http import urlsafe_base64_decode
+from django.views.decorators.http import condition
 
+from knox.auth import TokenAuthentication
 from knox.views import LoginView as KnoxLoginView
 
 from rest_framework import status
 from rest_framework.authentication import BasicAuthentication
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from elsa.commons.authentication import IsAdminOrHasMembership
+from elsa.commons.etags import daily_plan_etag
+
+from .bundles import get_daily_bundle
 from .serializers import (
     RequestPasswordResetSerializer,
     PerformPasswordResetSerializer,
@@ -118,3 +125,33 @@ class PerformPasswordResetView(APIView):
             },
             status=status.HTTP_401_UNAUTHORIZED,
         )
+
+
+class TodayView(APIView):
+    """Return the daily training, nutritional and psychological plans in
+    a single response, sharing the training clock and the day's training
+    plans between the three of them."""
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated, IsAdminOrHasMembership]
+
+    @method_decorator(
+        condition(
+            etag_func=daily_plan_etag(
+                "training_plans", "meal_summaries", "psychology"
+            )
+        )
+    )
+    def get(self, request):
+        bundle = get_daily_bundle(request.user)
+
+        # The nutrition section keeps its own message when the user's
+        # profile is incomplete, the other sections are still returned.
+        return Response(
+            {
+                "training": bundle["training"],
+                "nutrition": bundle["nutrition"],
+                "psychology": bundle["psychology"],
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,18 @@
+from os import environ
+from pathlib import Path
+
+
+def on_starting(server):
+    """Start the Prometheus multiprocess directory empty, the files left
+    by the workers of a previous run are not read again."""
+    if "PROMETHEUS_MULTIPROC_DIR" in environ:
+        for path in Path(environ["PROMETHEUS_MULTIPROC_DIR"]).glob("*.db"):
+            path.unlink()
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a dead worker from the scraped metrics."""
+    if "PROMETHEUS_MULTIPROC_DIR" in environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -15,6 +15,16 @@ def main():
         schedule_type=Schedule.CRON,
         cron="0 * * * *",
     )
+    Schedule.objects.create(
+        func="elsa.training_plans.api.build_complete_plan_templates",
+        schedule_type=Schedule.CRON,
+        cron="0 3 * * *",
+    )
+    Schedule.objects.create(
+        func="elsa.users.utils.precompute_daily_bundles",
+        schedule_type=Schedule.CRON,
+        cron="30 3 * * *",
+    )
 
 
 if __name__ == "__main__":